@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Local mirror of account history.
+Copies each account's account log and fills into an SQLite file, tracks a
+high-water mark per stream so every sync only fetches new entries, and
+answers PnL / fee / fill questions from disk without touching the API.
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    account     TEXT NOT NULL,
+    stream      TEXT NOT NULL,
+    hwm_id      INTEGER,
+    hwm_time    TEXT,
+    synced_at   REAL,
+    PRIMARY KEY (account, stream)
+);
+CREATE TABLE IF NOT EXISTS account_log (
+    account          TEXT NOT NULL,
+    id               INTEGER NOT NULL,
+    date             TEXT,
+    info             TEXT,
+    asset            TEXT,
+    contract         TEXT,
+    realized_pnl     REAL,
+    fee              REAL,
+    realized_funding REAL,
+    new_balance      REAL,
+    raw              TEXT,
+    PRIMARY KEY (account, id)
+);
+CREATE INDEX IF NOT EXISTS account_log_date ON account_log (account, date);
+CREATE TABLE IF NOT EXISTS fills (
+    account    TEXT NOT NULL,
+    fill_id    TEXT NOT NULL,
+    fill_time  TEXT,
+    symbol     TEXT,
+    side       TEXT,
+    size       REAL,
+    price      REAL,
+    order_id   TEXT,
+    fill_type  TEXT,
+    raw        TEXT,
+    PRIMARY KEY (account, fill_id)
+);
+CREATE INDEX IF NOT EXISTS fills_time ON fills (account, fill_time);
+"""
+
+COMMIT_EVERY = 500
+
+
+def _num(value: Any) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+class AccountMirror:
+    """
+    SQLite-backed history store, one file for any number of accounts.
+
+    The account log is pulled oldest-first from the stored high-water id
+    and committed every COMMIT_EVERY rows, so an interrupted sync resumes
+    where it stopped. Fills can only be paged newest-first; they are read
+    back to the stored high-water fill time and de-duplicated by fill_id.
+    """
+
+    def __init__(self, path: str = "account_mirror.db") -> None:
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._db.close()
+
+    # ------------------------------------------------------------------
+    # sync
+    # ------------------------------------------------------------------
+    def sync(self, account: str, client: Any) -> Dict[str, int]:
+        """Fetch everything new for account; return new rows per stream."""
+        return {
+            "account_log": self.sync_account_log(account, client),
+            "fills": self.sync_fills(account, client),
+        }
+
+    def sync_account_log(self, account: str, client: Any) -> int:
+        hwm_id, _ = self._high_water(account, "account_log")
+        params: Dict[str, Any] = {"sort": "asc"}
+        if hwm_id is not None:
+            params["from"] = hwm_id + 1
+
+        added = 0
+        with self._lock:
+            for entry in client.iter_account_log(params):
+                cur = self._db.execute(
+                    "INSERT OR IGNORE INTO account_log VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                    (
+                        account,
+                        int(entry["id"]),
+                        entry.get("date"),
+                        entry.get("info"),
+                        entry.get("asset"),
+                        entry.get("contract"),
+                        _num(entry.get("realized_pnl")),
+                        _num(entry.get("fee")),
+                        _num(entry.get("realized_funding")),
+                        _num(entry.get("new_balance")),
+                        json.dumps(entry),
+                    ),
+                )
+                added += cur.rowcount
+                hwm_id = int(entry["id"]) if hwm_id is None else max(hwm_id, int(entry["id"]))
+                if added and added % COMMIT_EVERY == 0:
+                    self._set_high_water(account, "account_log", hwm_id, None)
+                    self._db.commit()
+            self._set_high_water(account, "account_log", hwm_id, None)
+            self._db.commit()
+        return added
+
+    def sync_fills(self, account: str, client: Any) -> int:
+        _, hwm_time = self._high_water(account, "fills")
+        newest = hwm_time
+        added = 0
+        with self._lock:
+            for fill in client.iter_fills():
+                fill_time = fill.get("fillTime", "")
+                if hwm_time is not None and fill_time < hwm_time:
+                    break
+                cur = self._db.execute(
+                    "INSERT OR IGNORE INTO fills VALUES (?,?,?,?,?,?,?,?,?,?)",
+                    (
+                        account,
+                        fill["fill_id"],
+                        fill_time,
+                        fill.get("symbol", "").upper(),
+                        fill.get("side"),
+                        _num(fill.get("size")),
+                        _num(fill.get("price")),
+                        fill.get("order_id"),
+                        fill.get("fillType"),
+                        json.dumps(fill),
+                    ),
+                )
+                added += cur.rowcount
+                if newest is None or fill_time > newest:
+                    newest = fill_time
+            # fills arrive newest-first, so the mark only moves once the gap is closed
+            self._set_high_water(account, "fills", None, newest)
+            self._db.commit()
+        return added
+
+    def _high_water(self, account: str, stream: str) -> Tuple[Optional[int], Optional[str]]:
+        row = self._db.execute(
+            "SELECT hwm_id, hwm_time FROM sync_state WHERE account = ? AND stream = ?", (account, stream)
+        ).fetchone()
+        return (row["hwm_id"], row["hwm_time"]) if row else (None, None)
+
+    def _set_high_water(self, account: str, stream: str, hwm_id: Optional[int], hwm_time: Optional[str]) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO sync_state VALUES (?,?,?,?,?)",
+            (account, stream, hwm_id, hwm_time, time.time()),
+        )
+
+    # ------------------------------------------------------------------
+    # queries
+    # ------------------------------------------------------------------
+    def _log_sum(
+        self, column: str, account: str, since: Optional[str], until: Optional[str], contract: Optional[str]
+    ) -> float:
+        sql = f"SELECT COALESCE(SUM({column}), 0) FROM account_log WHERE account = ?"
+        args: List[Any] = [account]
+        if since:
+            sql += " AND date >= ?"
+            args.append(since)
+        if until:
+            sql += " AND date < ?"
+            args.append(until)
+        if contract:
+            sql += " AND UPPER(contract) = ?"
+            args.append(contract.upper())
+        with self._lock:
+            return float(self._db.execute(sql, args).fetchone()[0])
+
+    def realized_pnl(
+        self, account: str, since: Optional[str] = None, until: Optional[str] = None, contract: Optional[str] = None
+    ) -> float:
+        """Sum of realized PnL; since/until are ISO timestamps (until exclusive)."""
+        return self._log_sum("realized_pnl", account, since, until, contract)
+
+    def fees(
+        self, account: str, since: Optional[str] = None, until: Optional[str] = None, contract: Optional[str] = None
+    ) -> float:
+        return self._log_sum("fee", account, since, until, contract)
+
+    def funding(
+        self, account: str, since: Optional[str] = None, until: Optional[str] = None, contract: Optional[str] = None
+    ) -> float:
+        return self._log_sum("realized_funding", account, since, until, contract)
+
+    def fills(
+        self, account: str, symbol: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Mirrored fills, oldest first."""
+        sql = "SELECT fill_id, fill_time, symbol, side, size, price, order_id, fill_type FROM fills WHERE account = ?"
+        args: List[Any] = [account]
+        if symbol:
+            sql += " AND symbol = ?"
+            args.append(symbol.upper())
+        if since:
+            sql += " AND fill_time >= ?"
+            args.append(since)
+        if until:
+            sql += " AND fill_time < ?"
+            args.append(until)
+        sql += " ORDER BY fill_time, fill_id"
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, args)]
+
+    def fill_summary(self, account: str, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per symbol and side: fill count, total size and size-weighted average price."""
+        sql = (
+            "SELECT symbol, side, COUNT(*) AS fills, SUM(size) AS size, "
+            "SUM(size * price) / SUM(size) AS avg_price FROM fills WHERE account = ?"
+        )
+        args: List[Any] = [account]
+        if since:
+            sql += " AND fill_time >= ?"
+            args.append(since)
+        if until:
+            sql += " AND fill_time < ?"
+            args.append(until)
+        sql += " GROUP BY symbol, side ORDER BY symbol, side"
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, args)]
+
+# ------------------------------------------------------------------
+# quick self-test
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    import os
+    from kraken_futures import KrakenFuturesApi
+
+    KEY = os.getenv("KRAKEN_FUTURES_KEY", "YOUR_API_KEY")
+    SEC = os.getenv("KRAKEN_FUTURES_SECRET", "YOUR_API_SECRET")
+
+    mirror = AccountMirror()
+    print("--- sync ---")
+    print(mirror.sync("default", KrakenFuturesApi(KEY, SEC)))
+    print("\n--- from disk ---")
+    print("realized pnl:", mirror.realized_pnl("default"))
+    print("fees:", mirror.fees("default"))
+    print(mirror.fill_summary("default"))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Batch order builder.
+Collects send / edit / cancel instructions, serializes them into Kraken
+batchorder requests (split at the exchange limit) and maps every entry of
+the returned batchStatus back to the tag its caller chose.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from kraken_futures import with_cli_ord_id
+
+MAX_BATCH_SIZE = 20
+
+
+class BatchOrderBuilder:
+    """
+    Fluent builder over KrakenFuturesApi.batch_order.
+
+        results = (BatchOrderBuilder(client)
+                   .send("L1", {"orderType": "lmt", "symbol": s, "side": "buy", "size": 1, "limitPrice": p})
+                   .cancel("old-stop", order_id=stop_id)
+                   .execute())
+        results["L1"]["order_id"]
+
+    Every send gets a cliOrdId up front so a retried batch cannot duplicate
+    orders. Results are keyed by tag; instructions whose batch failed as a
+    whole map to {"status": "error", "error": ...}.
+    """
+
+    def __init__(self, client: Any, max_batch_size: int = MAX_BATCH_SIZE) -> None:
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self._instructions: List[Tuple[str, Dict[str, Any]]] = []
+
+    def __len__(self) -> int:
+        return len(self._instructions)
+
+    def order_refs(self) -> Dict[str, str]:
+        """tag -> order_id, or cliOrdId for sends, of every instruction so far."""
+        return {tag: i.get("order_id") or i["cliOrdId"] for tag, i in self._instructions}
+
+    # ------------------------------------------------------------------
+    # instructions
+    # ------------------------------------------------------------------
+    def send(self, tag: str, order: Dict[str, Any]) -> "BatchOrderBuilder":
+        """order uses the same fields as send_order (orderType, symbol, side, size, ...)."""
+        instruction = with_cli_ord_id({**order, "order": "send", "order_tag": tag})
+        return self._add(tag, instruction)
+
+    def edit(
+        self,
+        tag: str,
+        order_id: Optional[str] = None,
+        cli_ord_id: Optional[str] = None,
+        size: Optional[float] = None,
+        limit_price: Optional[float] = None,
+        stop_price: Optional[float] = None,
+    ) -> "BatchOrderBuilder":
+        instruction = self._target("edit", order_id, cli_ord_id)
+        for field, value in (("size", size), ("limitPrice", limit_price), ("stopPrice", stop_price)):
+            if value is not None:
+                instruction[field] = value
+        return self._add(tag, instruction)
+
+    def cancel(
+        self, tag: str, order_id: Optional[str] = None, cli_ord_id: Optional[str] = None
+    ) -> "BatchOrderBuilder":
+        return self._add(tag, self._target("cancel", order_id, cli_ord_id))
+
+    @staticmethod
+    def _target(kind: str, order_id: Optional[str], cli_ord_id: Optional[str]) -> Dict[str, Any]:
+        if not order_id and not cli_ord_id:
+            raise ValueError(f"{kind} needs order_id or cli_ord_id")
+        instruction: Dict[str, Any] = {"order": kind}
+        if order_id:
+            instruction["order_id"] = order_id
+        else:
+            instruction["cliOrdId"] = cli_ord_id
+        return instruction
+
+    def _add(self, tag: str, instruction: Dict[str, Any]) -> "BatchOrderBuilder":
+        if any(t == tag for t, _ in self._instructions):
+            raise ValueError(f"duplicate batch tag '{tag}'")
+        self._instructions.append((tag, instruction))
+        return self
+
+    # ------------------------------------------------------------------
+    # execution
+    # ------------------------------------------------------------------
+    def chunks(self) -> List[List[Tuple[str, Dict[str, Any]]]]:
+        size = max(1, self.max_batch_size)
+        return [self._instructions[i:i + size] for i in range(0, len(self._instructions), size)]
+
+    def _payload(self, chunk: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        return {"json": {"batchOrder": [instruction for _, instruction in chunk]}}
+
+    def execute(self) -> Dict[str, Dict[str, Any]]:
+        """Send every chunk with the sync client; return results keyed by tag."""
+        results: Dict[str, Dict[str, Any]] = {}
+        for chunk in self.chunks():
+            try:
+                resp = self.client.batch_order(self._payload(chunk))
+            except Exception as e:
+                resp = {"result": "error", "error": str(e)}
+            results.update(self._map_results(chunk, resp))
+        return results
+
+    async def execute_async(self) -> Dict[str, Dict[str, Any]]:
+        """Same as execute() for an AsyncKrakenFuturesApi client."""
+        results: Dict[str, Dict[str, Any]] = {}
+        for chunk in self.chunks():
+            try:
+                resp = await self.client.batch_order(self._payload(chunk))
+            except Exception as e:
+                resp = {"result": "error", "error": str(e)}
+            results.update(self._map_results(chunk, resp))
+        return results
+
+    @staticmethod
+    def _map_results(
+        chunk: List[Tuple[str, Dict[str, Any]]], resp: Dict[str, Any]
+    ) -> Dict[str, Dict[str, Any]]:
+        statuses = resp.get("batchStatus")
+        if not isinstance(statuses, list):
+            error = {"status": "error", "error": resp.get("error", resp)}
+            return {tag: dict(error) for tag, _ in chunk}
+
+        # sends echo order_tag; edits and cancels echo order_id / cliOrdId
+        by_tag = {s["order_tag"]: s for s in statuses if s.get("order_tag") is not None}
+        by_id: Dict[str, List[Dict[str, Any]]] = {}
+        for s in statuses:
+            if s.get("order_tag") is None:
+                for key in (s.get("order_id"), s.get("cliOrdId")):
+                    if key:
+                        by_id.setdefault(key, []).append(s)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for tag, instruction in chunk:
+            if instruction["order"] == "send":
+                status = by_tag.get(tag)
+            else:
+                matches = by_id.get(instruction.get("order_id") or instruction.get("cliOrdId"), [])
+                status = matches.pop(0) if matches else None
+            if status is None:
+                status = {"status": "missing", "error": "no batchStatus entry"}
+            if instruction.get("cliOrdId") and "cliOrdId" not in status:
+                status = {**status, "cliOrdId": instruction["cliOrdId"]}
+            results[tag] = status
+        return results
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+JSON decode benchmark.
+Times the old response path (bytes -> text -> stdlib json) against each
+available codec decoding the raw bytes directly.
+
+    python bench_json.py [payload.json ...] [-n iterations]
+
+Pass recorded responses (e.g. a saved /instruments or /history body) to
+benchmark real traffic; without files a synthetic instruments payload of
+realistic size is used.
+"""
+import json
+import sys
+import time
+from typing import Callable, List, Tuple
+
+from kraken_futures import JsonCodec, OrjsonCodec, orjson
+
+
+def synthetic_instruments(count: int = 400) -> bytes:
+    instruments = []
+    for i in range(count):
+        instruments.append({
+            "symbol": f"PF_SYM{i}USD",
+            "type": "flexible_futures",
+            "underlying": f"rr_sym{i}usd",
+            "tickSize": 0.5,
+            "contractSize": 1,
+            "tradeable": True,
+            "impactMidSize": 1,
+            "maxPositionSize": 1_000_000,
+            "openingDate": "2022-01-01T00:00:00.000Z",
+            "marginLevels": [
+                {"numNonContractUnits": n * 500_000, "initialMargin": 0.02 + n / 100, "maintenanceMargin": 0.01 + n / 200}
+                for n in range(8)
+            ],
+            "fundingRateCoefficient": 8,
+            "maxRelativeFundingRate": 0.001,
+            "isin": "GB00J62YGL67",
+            "contractValueTradePrecision": 4,
+            "postOnly": False,
+            "feeScheduleUid": "eef90775-995b-4596-9257-0917f6134766",
+            "retailMarginLevels": [],
+            "category": "Layer 1",
+            "tags": [],
+        })
+    return json.dumps({"result": "success", "instruments": instruments, "serverTime": "2024-01-01T00:00:00.000Z"}).encode()
+
+
+def legacy_decode(data: bytes) -> object:
+    """What requests' rsp.json() does: decode to text, then parse."""
+    return json.loads(data.decode("utf-8"))
+
+
+def bench(label: str, fn: Callable[[bytes], object], data: bytes, iterations: int, baseline: float = 0.0) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(data)
+    per_call = (time.perf_counter() - start) / iterations
+    mb_s = len(data) / per_call / 1e6
+    speedup = f"  {baseline / per_call:.2f}x vs legacy" if baseline else ""
+    print(f"  {label:<8} {per_call * 1e3:>9.3f} ms/parse  {mb_s:>8.1f} MB/s{speedup}")
+    return per_call
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    iterations = 50
+    if "-n" in args:
+        i = args.index("-n")
+        iterations = int(args[i + 1])
+        del args[i:i + 2]
+
+    payloads: List[Tuple[str, bytes]] = []
+    for path in args:
+        with open(path, "rb") as f:
+            payloads.append((path, f.read()))
+    if not payloads:
+        payloads.append(("synthetic instruments", synthetic_instruments()))
+
+    codecs = [("stdlib", JsonCodec().loads)]
+    if orjson is not None:
+        codecs.append(("orjson", OrjsonCodec().loads))
+    else:
+        print("orjson not installed; only the stdlib codec is measured")
+
+    for label, data in payloads:
+        print(f"{label} ({len(data) / 1024:.0f} KiB)")
+        baseline = bench("legacy", legacy_decode, data, iterations)
+        for name, loads in codecs:
+            bench(name, loads, data, iterations, baseline)
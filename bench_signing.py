@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Signing microbenchmark.
+Compares the legacy per-request key decode + HMAC construction against the
+client's pre-keyed HMAC template and prints signatures per second.
+
+    python bench_signing.py [iterations]
+"""
+import base64
+import hashlib
+import hmac
+import sys
+import time
+
+from kraken_futures import KrakenFuturesApi
+
+SECRET = base64.b64encode(b"s" * 64).decode()
+ENDPOINT = "/derivatives/api/v3/sendorder"
+POST_DATA = "orderType=lmt&symbol=PF_XBTUSD&side=buy&size=0.001&limitPrice=60000"
+
+
+def legacy_sign(api_secret: str, endpoint: str, nonce: str, post_data: str = "") -> str:
+    """Reference copy of the original _sign_request."""
+    path = endpoint[12:] if endpoint.startswith("/derivatives") else endpoint
+    message = (post_data + nonce + path).encode()
+    sha256_hash = hashlib.sha256(message).digest()
+    secret_decoded = base64.b64decode(api_secret)
+    sig = hmac.new(secret_decoded, sha256_hash, hashlib.sha512).digest()
+    return base64.b64encode(sig).decode()
+
+
+def bench(label: str, sign, iterations: int) -> float:
+    nonces = [f"{1_700_000_000_000 + i}00000" for i in range(iterations)]
+    start = time.perf_counter()
+    for nonce in nonces:
+        sign(ENDPOINT, nonce, POST_DATA)
+    elapsed = time.perf_counter() - start
+    rate = iterations / elapsed
+    print(f"{label:<10} {rate:>12,.0f} sig/s  ({elapsed * 1e6 / iterations:.2f} us/sig)")
+    return rate
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    api = KrakenFuturesApi("bench", SECRET)
+
+    assert api._sign_request(ENDPOINT, "1", POST_DATA) == legacy_sign(SECRET, ENDPOINT, "1", POST_DATA)
+
+    before = bench("before", lambda e, n, p: legacy_sign(SECRET, e, n, p), iterations)
+    after = bench("after", api._sign_request, iterations)
+    print(f"speed-up   {after / before:.2f}x")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Record / replay transport for KrakenFuturesApi.
+Recording wraps the live transport and writes every exchange to a gzipped
+JSON-lines cassette; replay serves those responses back offline, in
+order, with the recorded latencies scaled up or down.
+"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+import urllib.parse
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Only these response headers are kept. Request headers (APIKey, Nonce,
+# Authent) are never written, so cassettes hold no key material; the
+# account is recorded as a short hash of the APIKey.
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+Transport = Callable[..., Any]
+
+
+class RecordedResponse:
+    """The slice of requests.Response that KrakenFuturesApi reads."""
+
+    __slots__ = ("status_code", "headers", "content")
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes) -> None:
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+
+def _target(url: str) -> str:
+    """Path and query of url; the host is irrelevant for matching."""
+    parts = urllib.parse.urlsplit(url)
+    return parts.path + ("?" + parts.query if parts.query else "")
+
+
+def account_id(headers: Any) -> str:
+    """Redacted account identity: sha1 prefix of the APIKey header, "" if public."""
+    api_key = (headers or {}).get("APIKey")
+    if not api_key:
+        return ""
+    return hashlib.sha1(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class RecordingTransport:
+    """
+    Wraps a live transport (e.g. session.request) and appends each
+    exchange to path as it happens, so a crashed run still leaves a usable
+    cassette. Bodies of POSTs are kept for inspection but not matched on.
+    """
+
+    def __init__(self, path: str, inner: Transport) -> None:
+        self.path = path
+        self.inner = inner
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, method: str, url: str, headers: Any = None, data: Any = None, timeout: Any = None) -> Any:
+        start = time.perf_counter()
+        rsp = self.inner(method, url, headers=headers, data=data, timeout=timeout)
+        elapsed = time.perf_counter() - start
+        entry = {
+            "method": method.upper(),
+            "target": _target(url),
+            "account": account_id(headers),
+            "body": data or "",
+            "status": rsp.status_code,
+            "headers": {k: rsp.headers[k] for k in KEPT_HEADERS if k in rsp.headers},
+            "content": rsp.content.decode("utf-8", errors="replace"),
+            "elapsed": round(elapsed, 6),
+        }
+        with self._lock:
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._file.flush()
+        return rsp
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class ReplayTransport:
+    """
+    Serves a cassette back without touching the network.
+
+    Requests are matched on account, method and path+query in recorded
+    order, so a cassette recorded with several API keys hands each account
+    its own responses whatever order the calls come in; nonces and
+    signatures differ run to run and are ignored. Cassettes recorded
+    without an account field match any account. Each response
+    is delayed by its recorded latency times latency_scale (0 = instant,
+    1 = as recorded, 2 = twice as slow). An unmatched request raises
+    requests.ConnectionError, which the client treats like a network fault.
+    """
+
+    def __init__(self, path: str, latency_scale: float = 0.0) -> None:
+        self.path = path
+        self.latency_scale = latency_scale
+        self._queues: Dict[Tuple[str, str, Optional[str]], Deque[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.entries: List[Dict[str, Any]] = []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.append(entry)
+                    key = (entry["method"], entry["target"], entry.get("account"))
+                    self._queues.setdefault(key, deque()).append(entry)
+
+    def __call__(self, method: str, url: str, headers: Any = None, data: Any = None, timeout: Any = None) -> Any:
+        key = (method.upper(), _target(url), account_id(headers))
+        with self._lock:
+            queue = self._queues.get(key) or self._queues.get(key[:2] + (None,))
+            entry = queue.popleft() if queue else None
+        if entry is None:
+            raise requests.ConnectionError(f"cassette {self.path} has no recorded {key[0]} {key[1]} for this account")
+        if self.latency_scale > 0:
+            time.sleep(entry["elapsed"] * self.latency_scale)
+        return RecordedResponse(entry["status"], entry["headers"], entry["content"].encode("utf-8"))
+
+    def remaining(self) -> int:
+        """Recorded exchanges not yet replayed."""
+        with self._lock:
+            return sum(len(q) for q in self._queues.values())
+
+    def close(self) -> None:
+        pass
+
+
+def open_transport(path: str, mode: str, session: requests.Session, latency_scale: float = 0.0) -> Any:
+    """'record' wraps session.request; 'replay' serves path offline."""
+    if mode == "record":
+        return RecordingTransport(path, session.request)
+    if mode == "replay":
+        return ReplayTransport(path, latency_scale)
+    raise ValueError(f"unknown cassette mode '{mode}'")
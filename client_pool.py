@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Multi-account client pool.
+Hands out one KrakenFuturesApi per account, all sending through a single
+bounded keep-alive connection pool and sharing the public-data cache and
+instrument registry, while rate limits and nonces stay per API key.
+"""
+import hashlib
+import os
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import requests
+
+from instruments import DEFAULT_REFRESH_TTL, InstrumentRegistry
+from kraken_futures import (
+    DEFAULT_POOL_SIZE,
+    KrakenFuturesApi,
+    ResponseCache,
+    get_nonce_source,
+    get_rate_limiter,
+    make_session,
+)
+
+
+class ClientPool:
+    """
+    Registry of per-account clients over one shared transport.
+
+    Every client uses the same requests.Session, so the process holds at
+    most pool_size sockets to the exchange however many accounts are
+    added (pool_block makes extra callers wait for a free socket rather
+    than open new ones), and warm connections keep their TLS sessions and
+    skip DNS lookups. Rate limiters and nonce sources are the process-wide
+    per-key ones, so two accounts on one key still share a budget. With
+    nonce_dir set, nonces are file-backed so other processes on the same
+    keys stay collision-free. A transport (see cassette.py) replaces
+    session.request for every client, to record or replay a run.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        base_url: str = "https://futures.kraken.com",
+        cache: Optional[ResponseCache] = None,
+        nonce_dir: Optional[str] = None,
+        instruments_ttl: float = DEFAULT_REFRESH_TTL,
+        session: Optional[requests.Session] = None,
+        transport: Optional[Callable[..., Any]] = None,
+        **client_kwargs: Any,
+    ) -> None:
+        self.base_url = base_url
+        self.session = make_session(pool_size, pool_block=True) if session is None else session
+        self.transport = transport
+        self.cache = cache if cache is not None else ResponseCache()
+        self.nonce_dir = nonce_dir
+        self.client_kwargs = client_kwargs
+        self._clients: Dict[str, KrakenFuturesApi] = {}
+        # public endpoints need no account; this client only serves shared data
+        self.public = self._build("", "")
+        self.instruments = InstrumentRegistry(self.public, ttl=instruments_ttl)
+
+    def _build(self, api_key: str, api_secret: str) -> KrakenFuturesApi:
+        nonce_path = None
+        if self.nonce_dir and api_key:
+            os.makedirs(self.nonce_dir, exist_ok=True)
+            nonce_path = os.path.join(self.nonce_dir, hashlib.sha1(api_key.encode()).hexdigest() + ".nonce")
+        return KrakenFuturesApi(
+            api_key,
+            api_secret,
+            self.base_url,
+            session=self.session,
+            rate_limiter=get_rate_limiter(api_key),
+            cache=self.cache,
+            nonce_source=get_nonce_source(api_key, nonce_path),
+            transport=self.transport,
+            **self.client_kwargs,
+        )
+
+    def add(self, name: str, api_key: str, api_secret: str) -> KrakenFuturesApi:
+        if name in self._clients:
+            raise ValueError(f"account '{name}' already in pool")
+        client = self._clients[name] = self._build(api_key, api_secret)
+        return client
+
+    def get(self, name: str) -> Optional[KrakenFuturesApi]:
+        return self._clients.get(name)
+
+    def __getitem__(self, name: str) -> KrakenFuturesApi:
+        return self._clients[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._clients
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._clients)
+
+    def items(self) -> Iterator[Tuple[str, KrakenFuturesApi]]:
+        return iter(self._clients.items())
+
+    def headroom(self) -> Dict[str, Dict[str, float]]:
+        """Rate-limit tokens left per account and cost pool."""
+        return {name: client.rate_limiter.headroom() for name, client in self._clients.items()}
+
+    def close(self) -> None:
+        self.instruments.stop()
+        if self.transport is not None and hasattr(self.transport, "close"):
+            self.transport.close()
+        self.session.close()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Instrument registry.
+Built once from get_instruments: O(1) case-insensitive symbol lookup,
+pre-parsed tick / lot / precision / expiry, and integer scaling factors so
+prices and quantities round exactly instead of through float division.
+"""
+import logging
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger("Instruments")
+
+DEFAULT_REFRESH_TTL = 3600.0
+DEFAULT_TRADE_PRECISION = 3  # contractValueTradePrecision when the listing omits it
+
+
+def _decimals(step: float) -> int:
+    """Number of decimal places needed to represent step exactly."""
+    exponent = Decimal(repr(step)).normalize().as_tuple().exponent
+    return max(0, -exponent)
+
+
+class StepGrid:
+    """
+    Rounds values onto multiples of step using integer arithmetic.
+
+    The value is scaled to an integer count of 10**-decimals units and
+    snapped to the nearest multiple of step_units, so 0.1 + 0.2 style float
+    residue never leaks into an order payload.
+    """
+
+    __slots__ = ("step", "decimals", "scale", "step_units")
+
+    def __init__(self, step: float) -> None:
+        self.step = step
+        self.decimals = _decimals(step)
+        self.scale = 10 ** self.decimals
+        self.step_units = max(1, round(step * self.scale))
+
+    def steps(self, value: float) -> int:
+        return round(value * self.scale / self.step_units)
+
+    def round(self, value: float) -> float:
+        return round(self.steps(value) * self.step_units / self.scale, self.decimals)
+
+
+class InstrumentSpec:
+    __slots__ = (
+        "symbol",
+        "tick_size",
+        "lot_size",
+        "contract_size",
+        "contract_value_precision",
+        "qty_step",
+        "expiry",
+        "tradeable",
+        "price_grid",
+        "qty_grid",
+        "lot_grid",
+        "raw",
+    )
+
+    def __init__(self, inst: Dict[str, Any]) -> None:
+        self.symbol = inst["symbol"].upper()
+        self.tick_size = float(inst.get("tickSize", 0.5))
+        self.lot_size = float(inst.get("lotSize", 1.0))
+        self.contract_size = float(inst.get("contractSize", 1.0))
+        self.contract_value_precision = int(inst.get("contractValueTradePrecision", DEFAULT_TRADE_PRECISION))
+        self.qty_step = 10.0 ** (-self.contract_value_precision)
+        expiry = inst.get("lastTradingTime")
+        self.expiry = datetime.fromisoformat(expiry.replace("Z", "+00:00")) if expiry else None
+        self.tradeable = bool(inst.get("tradeable", True))
+        self.price_grid = StepGrid(self.tick_size)
+        self.qty_grid = StepGrid(self.qty_step)
+        self.lot_grid = StepGrid(self.lot_size)
+        self.raw = inst
+
+    def round_price(self, price: float) -> float:
+        return self.price_grid.round(price)
+
+    def round_qty(self, qty: float) -> float:
+        """Nearest qty_step multiple, never below one step."""
+        return max(self.qty_grid.round(qty), self.qty_step)
+
+    def round_lots(self, qty: float) -> float:
+        """Nearest lotSize multiple (an int when lots are whole contracts)."""
+        rounded = self.lot_grid.round(qty)
+        return int(rounded) if self.lot_grid.decimals == 0 else rounded
+
+
+def index_by_symbol(rows: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Map upper-cased symbol -> row, e.g. for a get_tickers() list."""
+    return {row["symbol"].upper(): row for row in rows}
+
+
+class InstrumentRegistry:
+    """
+    Shared, refreshable symbol -> InstrumentSpec map.
+
+    Lookups are case-insensitive dict hits. refresh() swaps in a new map
+    atomically, so readers never see a half-built registry; start() keeps
+    it current from a daemon thread every ttl seconds.
+    """
+
+    def __init__(self, client: Any = None, ttl: float = DEFAULT_REFRESH_TTL) -> None:
+        self.client = client
+        self.ttl = ttl
+        self._specs: Dict[str, InstrumentSpec] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_instruments(cls, resp: Dict[str, Any]) -> "InstrumentRegistry":
+        registry = cls()
+        registry.load(resp)
+        return registry
+
+    def load(self, resp: Dict[str, Any]) -> None:
+        specs = {}
+        for inst in resp.get("instruments", []):
+            try:
+                spec = InstrumentSpec(inst)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping instrument {inst.get('symbol')}: {e}")
+                continue
+            specs[spec.symbol] = spec
+        self._specs = specs
+
+    def refresh(self) -> None:
+        self.load(self.client.get_instruments())
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name="instrument-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.ttl):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Instrument refresh failed, keeping previous specs: {e}")
+
+    def get(self, symbol: str) -> Optional[InstrumentSpec]:
+        return self._specs.get(symbol.upper())
+
+    def __getitem__(self, symbol: str) -> InstrumentSpec:
+        return self._specs[symbol.upper()]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._specs
+
+    def __len__(self) -> int:
+        return len(self._specs)
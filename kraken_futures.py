@@ -4,52 +4,1123 @@ Kraken-Futures API client.
 1-to-1 translation of the official JS sample.
 """
 import base64
+import contextlib
+import contextvars
+import copy
 import hashlib
 import hmac
+import json
+import os
+import random
+import threading
 import time
 import urllib.parse
-from typing import Dict, Any, Optional
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
+try:
+    import fcntl
+except ImportError:  # not available on Windows; FileNonceSource needs it
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # optional fast JSON parser
+    orjson = None
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = (3.05, 10.0)  # (connect, read) seconds
+
+
+def make_session(pool_size: int = DEFAULT_POOL_SIZE, pool_block: bool = False) -> requests.Session:
+    """
+    Build a keep-alive session with a bounded connection pool.
+
+    Pass the same session to several clients to share one transport.
+    With pool_block=True callers wait for a free socket instead of
+    opening more than pool_size connections per host.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=pool_block)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Connection": "keep-alive",
+        "User-Agent": "Kraken-Futures-Py-Client/1.0",
+    })
+    return session
+
+
+# ------------------------------------------------------------------
+# JSON codecs
+# ------------------------------------------------------------------
+class JsonCodec:
+    """Stdlib codec. Subclasses swap in a faster parser with the same interface."""
+
+    name = "json"
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
+
+class OrjsonCodec(JsonCodec):
+    """Parses straight from the raw response bytes; requires the orjson package."""
+
+    name = "orjson"
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+
+def default_codec() -> JsonCodec:
+    """The fastest codec available in this environment."""
+    return OrjsonCodec() if orjson is not None else JsonCodec()
+
+
+# ------------------------------------------------------------------
+# rate limiting
+# ------------------------------------------------------------------
+# Kraken meters private calls per API key against two budgets:
+#   derivatives : 500 cost units, refilled over 10 seconds
+#   history     : 100 tokens, refilled over 10 minutes
+RATE_LIMIT_POOLS: Dict[str, Tuple[float, float]] = {
+    "derivatives": (500.0, 500.0 / 10.0),
+    "history": (100.0, 100.0 / 600.0),
+}
+
+ENDPOINT_COSTS: Dict[str, Tuple[str, float]] = {
+    "/derivatives/api/v3/sendorder": ("derivatives", 10),
+    "/derivatives/api/v3/editorder": ("derivatives", 10),
+    "/derivatives/api/v3/cancelorder": ("derivatives", 10),
+    "/derivatives/api/v3/cancelallorders": ("derivatives", 25),
+    "/derivatives/api/v3/cancelallordersafter": ("derivatives", 25),
+    "/derivatives/api/v3/batchorder": ("derivatives", 9),  # + 1 per instruction
+    "/derivatives/api/v3/accounts": ("derivatives", 2),
+    "/derivatives/api/v3/openpositions": ("derivatives", 2),
+    "/derivatives/api/v3/openorders": ("derivatives", 2),
+    "/derivatives/api/v3/recentorders": ("derivatives", 2),
+    "/derivatives/api/v3/fills": ("derivatives", 2),  # 25 with lastFillTime
+    "/derivatives/api/v3/transfers": ("derivatives", 10),
+    "/derivatives/api/v3/notifications": ("derivatives", 2),
+    "/derivatives/api/v3/orders": ("derivatives", 1),
+    "/api/history/v2/account-log": ("history", 3),
+}
+
+
+def endpoint_cost(endpoint: str, params: Optional[Dict[str, Any]] = None) -> Optional[Tuple[str, float]]:
+    """Return (pool, cost) for a metered endpoint, or None for public ones."""
+    entry = ENDPOINT_COSTS.get(endpoint)
+    if entry is None:
+        return None
+    pool, cost = entry
+    params = params or {}
+    if endpoint.endswith("/batchorder"):
+        batch = params.get("json", {})
+        if isinstance(batch, str):
+            batch = json.loads(batch)
+        cost += len(batch.get("batchOrder", []))
+    elif endpoint.endswith("/fills") and "lastFillTime" in params:
+        cost = 25
+    return pool, cost
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that lets callers queue for capacity.
+
+    reserve() debits the cost immediately, even into a negative balance,
+    and returns how long the caller must wait before sending. Later callers
+    queue behind the debt, so requests go out in arrival order at the
+    refill rate instead of being rejected by the exchange.
+    """
+
+    def __init__(self, capacity: float, refill_per_sec: float) -> None:
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_sec)
+        self._updated = now
+
+    def reserve(self, cost: float) -> float:
+        cost = min(cost, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= cost
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.refill_per_sec
+
+    def refund(self, cost: float) -> None:
+        """Return tokens from a reservation that was abandoned before sending."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + min(cost, self.capacity))
+
+    def headroom(self) -> float:
+        """Tokens available right now (negative while callers are queued)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class RateLimiter:
+    """One token bucket per Kraken cost pool for a single API key."""
+
+    def __init__(self, pools: Optional[Dict[str, Tuple[float, float]]] = None) -> None:
+        pools = pools or RATE_LIMIT_POOLS
+        self.buckets = {name: TokenBucket(cap, rate) for name, (cap, rate) in pools.items()}
+
+    def reserve(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> float:
+        """Debit the endpoint's cost and return the delay before it may be sent."""
+        entry = endpoint_cost(endpoint, params)
+        if entry is None:
+            return 0.0
+        pool, cost = entry
+        return self.buckets[pool].reserve(cost)
+
+    def refund(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> None:
+        entry = endpoint_cost(endpoint, params)
+        if entry is not None:
+            pool, cost = entry
+            self.buckets[pool].refund(cost)
+
+    def acquire(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> None:
+        """Blocking variant of reserve()."""
+        delay = self.reserve(endpoint, params)
+        if delay > 0:
+            time.sleep(delay)
+
+    def headroom(self) -> Dict[str, float]:
+        return {name: bucket.headroom() for name, bucket in self.buckets.items()}
+
+
+_RATE_LIMITERS: Dict[str, RateLimiter] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(api_key: str) -> RateLimiter:
+    """Return the process-wide limiter for api_key, creating it on first use."""
+    with _RATE_LIMITERS_LOCK:
+        limiter = _RATE_LIMITERS.get(api_key)
+        if limiter is None:
+            limiter = _RATE_LIMITERS[api_key] = RateLimiter()
+        return limiter
+
+
+# ------------------------------------------------------------------
+# nonces
+# ------------------------------------------------------------------
+# Nonces keep the original shape: wall-clock milliseconds followed by a
+# 5-digit counter, i.e. ms * 100_000 + n. Staying on that scale means a
+# switch between sources never steps backwards from nonces already used.
+NONCE_COUNTER_SPAN = 100_000
+
+
+def _clock_nonce() -> int:
+    return (time.time_ns() // 1_000_000) * NONCE_COUNTER_SPAN
+
+
+class NonceSource:
+    """
+    Strictly increasing nonces, safe across threads.
+
+    Each nonce is max(clock, previous + 1), so it never repeats or goes
+    backwards even when the clock stalls, steps back, or more than
+    NONCE_COUNTER_SPAN nonces are drawn in one millisecond.
+    """
+
+    def __init__(self) -> None:
+        self._last = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> str:
+        with self._lock:
+            self._last = max(_clock_nonce(), self._last + 1)
+            return str(self._last)
+
+
+class FileNonceSource(NonceSource):
+    """
+    NonceSource shared by every process that uses the same file.
+
+    The last issued nonce lives in path; each call takes an exclusive
+    flock, reads it, writes the successor and releases the lock, so
+    workers in separate processes on one key never collide. POSIX only.
+
+    flock locks belong to the open file description, which a forked child
+    shares with its parent, so the file is re-opened in each process that
+    uses the source rather than inherited.
+    """
+
+    def __init__(self, path: str) -> None:
+        if fcntl is None:
+            raise RuntimeError("FileNonceSource requires fcntl (POSIX)")
+        super().__init__()
+        self.path = os.path.abspath(path)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._pid = os.getpid()
+
+    def _own_fd(self) -> int:
+        # caller holds self._lock
+        if self._pid != os.getpid():
+            # forked: drop the inherited description (without closing it
+            # under the parent) and open our own
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+        return self._fd
+
+    def next(self) -> str:
+        with self._lock:
+            fd = self._own_fd()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                os.lseek(fd, 0, os.SEEK_SET)
+                stored = os.read(fd, 32).strip()
+                last = max(int(stored) if stored else 0, self._last)
+                self._last = max(_clock_nonce(), last + 1)
+                encoded = str(self._last).encode()
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, encoded)
+                os.ftruncate(fd, len(encoded))
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            return str(self._last)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                os.close(self._fd)
+
+
+_NONCE_SOURCES: Dict[str, NonceSource] = {}
+_NONCE_SOURCES_LOCK = threading.Lock()
+
+
+def get_nonce_source(api_key: str, path: Optional[str] = None) -> NonceSource:
+    """
+    Return the process-wide nonce source for api_key, creating it on first use.
+
+    With path set, the first call creates a FileNonceSource there so other
+    processes using the same path share the sequence. Asking for a path
+    once the key already has an in-memory source, or a different file,
+    raises ValueError rather than quietly handing back a source without
+    the requested cross-process guarantee; without a path, whatever source
+    the key has is returned.
+    """
+    with _NONCE_SOURCES_LOCK:
+        source = _NONCE_SOURCES.get(api_key)
+        if source is None:
+            source = FileNonceSource(path) if path else NonceSource()
+            _NONCE_SOURCES[api_key] = source
+        elif path:
+            current = getattr(source, "path", None)
+            if current != os.path.abspath(path):
+                raise ValueError(
+                    f"nonce source for this key already in use ({current or 'in-memory'}); "
+                    f"cannot switch to {path}"
+                )
+        return source
+
+
+# ------------------------------------------------------------------
+# deadlines
+# ------------------------------------------------------------------
+class DeadlineExceeded(RuntimeError):
+    """Raised when a call cannot finish before the active deadline."""
+
+
+# absolute time.monotonic() by which every request in the current thread
+# or asyncio task must finish; None means unbounded
+_DEADLINE: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar("kf_deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """
+    Bound every request made inside the block to finish within seconds.
+
+    Socket timeouts, rate-limit queueing and retry backoff are all clipped
+    to the time left, and nothing new starts once it has passed. Nested
+    deadlines keep the earlier one.
+
+    For the sync client this is best-effort, not a wall-clock kill:
+    requests applies the timeout to the connect and to each socket read,
+    not to the whole response, so a server that keeps trickling bytes can
+    hold an attempt past the deadline. A GET that completes late raises
+    DeadlineExceeded instead of returning; a late POST response is still
+    returned, because the exchange has already acted on it. The async
+    client enforces the deadline as an aiohttp total timeout. Callers that
+    need a hard bound should also wait on the work with a timeout.
+    """
+    end = time.monotonic() + seconds
+    current = _DEADLINE.get()
+    token = _DEADLINE.set(end if current is None else min(current, end))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def time_remaining() -> Optional[float]:
+    """Seconds left before the active deadline, or None when there is none."""
+    end = _DEADLINE.get()
+    return None if end is None else end - time.monotonic()
+
+
+# ------------------------------------------------------------------
+# retries
+# ------------------------------------------------------------------
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    Attempt n (0-based) waits a random time in [0, min(max_delay, base_delay * 2**n)].
+    Only responses whose status is in retry_statuses, and connection or
+    timeout errors, are retried.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.25,
+        max_delay: float = 4.0,
+        retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504),
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+# POSTs that are safe to repeat: cancels and edits converge on the same
+# state, and sendorder/batchorder carry a client order id (see below).
+IDEMPOTENT_POSTS = frozenset({
+    "/derivatives/api/v3/sendorder",
+    "/derivatives/api/v3/batchorder",
+    "/derivatives/api/v3/editorder",
+    "/derivatives/api/v3/cancelorder",
+    "/derivatives/api/v3/cancelallorders",
+    "/derivatives/api/v3/cancelallordersafter",
+})
+
+
+def with_cli_ord_id(order: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of order carrying a cliOrdId, generating one if absent."""
+    if order.get("cliOrdId"):
+        return order
+    return {**order, "cliOrdId": uuid.uuid4().hex}
+
+
+def with_batch_cli_ord_ids(params: Dict[str, Any], codec: Optional[JsonCodec] = None) -> Dict[str, Any]:
+    """Give every 'send' instruction in a batchorder payload a cliOrdId."""
+    batch = params.get("json")
+    if batch is None:
+        return params
+    codec = codec or JsonCodec()
+    if isinstance(batch, str):
+        batch = codec.loads(batch)
+    instructions = [
+        with_cli_ord_id(i) if i.get("order") == "send" else i
+        for i in batch.get("batchOrder", [])
+    ]
+    return {**params, "json": codec.dumps({**batch, "batchOrder": instructions})}
+
+
+# ------------------------------------------------------------------
+# response cache
+# ------------------------------------------------------------------
+DEFAULT_CACHE_TTLS: Dict[str, float] = {
+    "/derivatives/api/v3/instruments": 300.0,
+    "/derivatives/api/v3/tickers": 5.0,
+    "/derivatives/api/v3/orderbook": 1.0,
+    "/derivatives/api/v3/history": 5.0,
+}
+
+
+class CacheEntry:
+    __slots__ = ("data", "etag", "last_modified", "stored_at", "ttl")
+
+    def __init__(self, data: Any, etag: Optional[str], last_modified: Optional[str], stored_at: float, ttl: float) -> None:
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.ttl = ttl
+
+    def is_fresh(self) -> bool:
+        return time.time() - self.stored_at < self.ttl
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Opt-in cache for GET responses, keyed by URL and query.
+
+    Only endpoints listed in ttls are cached (public data by default). A
+    fresh entry is served without any network call; a stale one is
+    revalidated with If-None-Match / If-Modified-Since when the server sent
+    validators, and a 304 just renews it. The memory tier is an LRU capped
+    at max_entries. With disk_dir set, entries are also written there so a
+    restart starts warm. Cached responses are shared between callers and
+    must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 256,
+        disk_dir: Optional[str] = None,
+        codec: Optional[JsonCodec] = None,
+    ) -> None:
+        self.ttls = dict(DEFAULT_CACHE_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.codec = codec or default_codec()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def key(self, api_key: str, url: str, endpoint: str) -> Optional[str]:
+        """Cache key for a GET of url, or None when endpoint is not cacheable."""
+        if endpoint not in self.ttls:
+            return None
+        # anything metered is private: never share it between API keys
+        return f"{api_key}|{url}" if endpoint in ENDPOINT_COSTS else url
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self.disk_dir:
+            entry = self._load(key)
+            if entry is not None:
+                self._remember(key, entry)
+        with self._lock:
+            if entry is not None and entry.is_fresh():
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry
+
+    def put(self, key: str, endpoint: str, data: Any, raw: bytes, headers: Any) -> None:
+        entry = CacheEntry(
+            data, headers.get("ETag"), headers.get("Last-Modified"), time.time(), self.ttls[endpoint]
+        )
+        self._remember(key, entry)
+        if self.disk_dir:
+            self._save(key, entry, raw)
+
+    def renew(self, key: str, entry: CacheEntry) -> Any:
+        """Mark entry fresh again after a 304 and return its data."""
+        with self._lock:
+            self.revalidations += 1
+        entry.stored_at = time.time()
+        if self.disk_dir:
+            path = self._path(key)
+            if os.path.exists(path):
+                os.utime(path)
+        return entry.data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def _save(self, key: str, entry: CacheEntry, raw: bytes) -> None:
+        meta = {"key": key, "ttl": entry.ttl, "etag": entry.etag, "last_modified": entry.last_modified}
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(meta).encode() + b"\n" + raw)
+        os.replace(tmp, self._path(key))
+
+    def _load(self, key: str) -> Optional[CacheEntry]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                meta_line, raw = f.read().split(b"\n", 1)
+            meta = json.loads(meta_line)
+            return CacheEntry(
+                self.codec.loads(raw), meta["etag"], meta["last_modified"], os.path.getmtime(path), meta["ttl"]
+            )
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+# ------------------------------------------------------------------
+# request coalescing
+# ------------------------------------------------------------------
+def _caller_failure(error: BaseException) -> bool:
+    """
+    True for failures that belong to the caller running a coalesced call
+    rather than to the call itself: its own deadline, or its cancellation
+    or interruption. Waiters treat these as "no result" and call again.
+    """
+    return isinstance(error, DeadlineExceeded) or not isinstance(error, Exception)
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one.
+
+    The first caller for a key runs the call; callers arriving while it is
+    in flight wait and receive a deep copy of its result (or its error), so
+    no caller can mutate another's response. If the leader gives up for its
+    own reasons (its deadline, an interrupt), waiters are not failed with
+    it: one of them leads a fresh call. Nothing is cached once the call
+    completes.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Any, _Flight] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.calls += 1
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+            if leader:
+                break
+            if not flight.done.wait(time_remaining()):
+                raise DeadlineExceeded(f"{key} : deadline exceeded waiting for in-flight call")
+            if flight.error is not None and _caller_failure(flight.error):
+                continue
+            with self._lock:
+                self.coalesced += 1
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """calls seen, and how many were served by another caller's request."""
+        return {"calls": self.calls, "coalesced": self.coalesced}
+
+
+_SINGLE_FLIGHT = SingleFlight()
+
+
+# ------------------------------------------------------------------
+# instrumentation
+# ------------------------------------------------------------------
+class LatencyHistogram:
+    """
+    Log-linear (HDR-style) latency histogram.
+
+    Values are bucketed in whole microseconds: below 2**SUB_BUCKET_BITS each
+    value has its own bucket, above that every power-of-two range is split
+    into 2**(SUB_BUCKET_BITS - 1) linear sub-buckets. Quantiles are then
+    within about 1.6% of the true value, from microseconds to minutes, in a
+    few hundred counters.
+    """
+
+    SUB_BUCKET_BITS = 7
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    @classmethod
+    def _index(cls, micros: int) -> int:
+        shift = max(0, micros.bit_length() - cls.SUB_BUCKET_BITS)
+        return (shift << cls.SUB_BUCKET_BITS) + (micros >> shift)
+
+    @classmethod
+    def _upper(cls, index: int) -> int:
+        """Highest microsecond value that lands in bucket index."""
+        shift = index >> cls.SUB_BUCKET_BITS
+        sub = index & ((1 << cls.SUB_BUCKET_BITS) - 1)
+        return ((sub + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        index = self._index(max(0, int(seconds * 1e6)))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantiles(self, qs: Tuple[float, ...]) -> List[float]:
+        """Seconds at each quantile (0..1), capped at the exact max."""
+        if not self.count:
+            return [0.0] * len(qs)
+        out = []
+        indexes = sorted(self.counts)
+        pos, seen = 0, self.counts[indexes[0]]
+        for q in qs:
+            rank = max(1, q * self.count)
+            while seen < rank and pos + 1 < len(indexes):
+                pos += 1
+                seen += self.counts[indexes[pos]]
+            out.append(min(self._upper(indexes[pos]) / 1e6, self.max))
+        return out
+
+    def snapshot(self) -> Dict[str, float]:
+        p50, p90, p99 = self.quantiles((0.5, 0.9, 0.99))
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "p50": p50,
+            "p90": p90,
+            "p99": p99,
+            "max": self.max,
+        }
+
+
+class RequestTiming:
+    """What one _request call did: phase times in seconds, sizes, outcome."""
+
+    __slots__ = (
+        "method",
+        "endpoint",
+        "status",
+        "error",
+        "attempts",
+        "cached",
+        "sign",
+        "network",
+        "parse",
+        "total",
+        "bytes_in",
+        "bytes_out",
+    )
+
+    def __init__(self, method: str, endpoint: str) -> None:
+        self.method = method
+        self.endpoint = endpoint
+        self.status: Optional[int] = None
+        self.error: Optional[BaseException] = None
+        self.attempts = 0
+        self.cached = False
+        self.sign = 0.0
+        self.network = 0.0
+        self.parse = 0.0
+        self.total = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def coalesced(self) -> bool:
+        """Served by another caller's in-flight request."""
+        return not self.cached and self.attempts == 0 and self.error is None
+
+
+REQUEST_PHASES = ("total", "sign", "network", "parse")
+
+
+class _EndpointStats:
+    __slots__ = ("histograms", "requests", "errors", "retries", "cache_hits", "coalesced", "bytes_in", "bytes_out")
+
+    def __init__(self) -> None:
+        self.histograms = {phase: LatencyHistogram() for phase in REQUEST_PHASES}
+        self.requests = self.errors = self.retries = self.cache_hits = self.coalesced = 0
+        self.bytes_in = self.bytes_out = 0
+
+
+class Instrumentation:
+    """
+    Per-endpoint request metrics fed by every client that shares it.
+
+    Each completed _request adds its total, signing, network and parse time
+    to that endpoint's histograms (network covers every attempt, including
+    failed ones; cache hits and coalesced waiters only count, they send
+    nothing), and bumps request / error / retry counters and byte totals.
+
+    Counters only go up unless reset. A consumer that wants per-interval
+    figures attaches its own Instrumentation as a sink, which sees every
+    observation, and resets that instead of the shared instance.
+    """
+
+    def __init__(self) -> None:
+        self._stats: Dict[str, _EndpointStats] = {}
+        self._lock = threading.Lock()
+        self._sinks: List["Instrumentation"] = []
+        self.started = time.time()
+
+    def attach(self, sink: "Instrumentation") -> None:
+        """Forward every future observation to sink as well."""
+        with self._lock:
+            self._sinks = self._sinks + [sink]
+
+    def detach(self, sink: "Instrumentation") -> None:
+        with self._lock:
+            self._sinks = [s for s in self._sinks if s is not sink]
+
+    def observe(self, timing: RequestTiming) -> None:
+        self._record(timing)
+        for sink in self._sinks:
+            sink.observe(timing)
+
+    def _record(self, timing: RequestTiming) -> None:
+        with self._lock:
+            stats = self._stats.get(timing.endpoint)
+            if stats is None:
+                stats = self._stats[timing.endpoint] = _EndpointStats()
+            stats.requests += 1
+            stats.bytes_in += timing.bytes_in
+            stats.bytes_out += timing.bytes_out
+            stats.retries += max(0, timing.attempts - 1)
+            if timing.error is not None:
+                stats.errors += 1
+            if timing.cached:
+                stats.cache_hits += 1
+                return
+            if timing.coalesced:
+                stats.coalesced += 1
+                return
+            stats.histograms["total"].record(timing.total)
+            if timing.attempts:
+                stats.histograms["sign"].record(timing.sign)
+                stats.histograms["network"].record(timing.network)
+            if timing.status is not None and timing.error is None:
+                stats.histograms["parse"].record(timing.parse)
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        endpoint -> counters plus {count, mean, min, p50, p90, p99, max}
+        seconds per phase; reset starts a fresh interval atomically.
+        """
+        with self._lock:
+            snap = {
+                endpoint: {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "cache_hits": stats.cache_hits,
+                    "coalesced": stats.coalesced,
+                    "bytes_in": stats.bytes_in,
+                    "bytes_out": stats.bytes_out,
+                    **{phase: hist.snapshot() for phase, hist in stats.histograms.items()},
+                }
+                for endpoint, stats in self._stats.items()
+            }
+            if reset:
+                self._stats = {}
+                self.started = time.time()
+            return snap
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+            self.started = time.time()
+
+
+_INSTRUMENTATION = Instrumentation()
+
+
+class MetricsExporter:
+    """
+    Appends an Instrumentation snapshot to a JSON-lines file every interval
+    seconds from a daemon thread. With reset set, each line covers only its
+    own interval: the exporter counts into a private Instrumentation
+    attached as a sink and resets that, so the shared instance (also
+    scraped as Prometheus counters) keeps its running totals.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        instrumentation: Optional[Instrumentation] = None,
+        interval: float = 60.0,
+        reset: bool = True,
+    ) -> None:
+        self.path = path
+        self.instrumentation = instrumentation or _INSTRUMENTATION
+        self.interval = interval
+        self.reset = reset
+        self._source = self.instrumentation
+        if reset:
+            self._source = Instrumentation()
+            self.instrumentation.attach(self._source)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self) -> Dict[str, Any]:
+        since = self._source.started
+        endpoints = self._source.snapshot(reset=self.reset)
+        line = {"time": time.time(), "since": since, "endpoints": endpoints}
+        with open(self.path, "a") as f:
+            f.write(json.dumps(line, separators=(",", ":")) + "\n")
+        return line
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._source is not self.instrumentation:
+            self.instrumentation.detach(self._source)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            with contextlib.suppress(OSError):
+                self.export()
+
+
+# ------------------------------------------------------------------
+# pagination cursors
+# ------------------------------------------------------------------
+# Each cursor takes (params, page records, raw response) and returns the
+# params for the next page, or None when the pages are exhausted. Pages
+# are walked newest-first unless the caller asks for sort=asc.
+PageCursor = Callable[[Dict[str, Any], List[Dict[str, Any]], Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+def _continuation(params: Dict[str, Any], resp: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    token = resp.get("continuationToken")
+    return {**params, "continuationToken": token} if token else None
+
+
+def _fills_cursor(params: Dict[str, Any], records: List[Dict[str, Any]], resp: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return _continuation(params, resp) or {**params, "lastFillTime": records[-1]["fillTime"]}
+
+
+def _history_cursor(params: Dict[str, Any], records: List[Dict[str, Any]], resp: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return _continuation(params, resp) or {**params, "lastTime": records[-1]["time"]}
+
+
+def _account_log_cursor(params: Dict[str, Any], records: List[Dict[str, Any]], resp: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    nxt = _continuation(params, resp)
+    if nxt is not None:
+        return nxt
+    if params.get("sort") == "asc":
+        return {**params, "from": records[-1]["id"] + 1}
+    return {**params, "to": records[-1]["id"] - 1}
+
+
+# endpoint -> (records key, record id key, cursor)
+PAGINATION: Dict[str, Tuple[str, str, PageCursor]] = {
+    "/derivatives/api/v3/fills": ("fills", "fill_id", _fills_cursor),
+    "/derivatives/api/v3/history": ("history", "uid", _history_cursor),
+    "/api/history/v2/account-log": ("logs", "id", _account_log_cursor),
+}
+
+
+class _KrakenFuturesBase:
+    """Key handling, nonces and request signing shared by the sync and async clients."""
 
-class KrakenFuturesApi:
     def __init__(
         self,
         api_key: str,
         api_secret: str,
-        base_url: str = "https://futures.kraken.com",
+        base_url: str,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_policies: Optional[Dict[str, RetryPolicy]] = None,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        codec: Optional[JsonCodec] = None,
+        cache: Optional[ResponseCache] = None,
+        nonce_source: Optional[NonceSource] = None,
+        instrumentation: Optional[Instrumentation] = _INSTRUMENTATION,
     ) -> None:
         self.api_key = api_key
         self.api_secret = api_secret
         self.base_url = base_url.rstrip("/")
-        self._nonce_counter = 0
+        self.nonce_source = nonce_source if nonce_source is not None else get_nonce_source(api_key)
+        self._hmac_template: Optional["hmac.HMAC"] = None
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter(api_key)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_policies = dict(retry_policies or {})
+        self.timeout = timeout
+        self.codec = codec or default_codec()
+        self.cache = cache
+        # per-endpoint latency and error stats; pass None to disable
+        self.instrumentation = instrumentation
+        # before(method, endpoint, params) and after(RequestTiming) around every _request
+        self.before_request_hooks: List[Callable[[str, str, Optional[Dict[str, Any]]], None]] = []
+        self.after_request_hooks: List[Callable[[RequestTiming], None]] = []
 
     # ------------------------------------------------------------------
     # low-level helpers
     # ------------------------------------------------------------------
     def _create_nonce(self) -> str:
-        if self._nonce_counter > 9_999:
-            self._nonce_counter = 0
-        counter_str = f"{self._nonce_counter:05d}"
-        self._nonce_counter += 1
-        return f"{int(time.time() * 1_000)}{counter_str}"
+        return self.nonce_source.next()
 
     def _sign_request(self, endpoint: str, nonce: str, post_data: str = "") -> str:
         # strip '/derivatives' prefix if present
         path = endpoint[12:] if endpoint.startswith("/derivatives") else endpoint
         message = (post_data + nonce + path).encode()
-        sha256_hash = hashlib.sha256(message).digest()
-        secret_decoded = base64.b64decode(self.api_secret)
-        sig = hmac.new(secret_decoded, sha256_hash, hashlib.sha512).digest()
-        return base64.b64encode(sig).decode()
+        return self._sign_digest(hashlib.sha256(message).digest())
 
-    # ------------------------------------------------------------------
-    # single universal request method
-    # ------------------------------------------------------------------
-    def _request(
+    def sign_challenge(self, challenge: str) -> str:
+        """Sign a WebSocket challenge with the same key material as REST calls."""
+        return self._sign_digest(hashlib.sha256(challenge.encode()).digest())
+
+    def _sign_digest(self, digest: bytes) -> str:
+        # the secret is decoded and keyed into HMAC-SHA512 once; each
+        # signature clones that state instead of re-keying from scratch
+        if self._hmac_template is None:
+            secret_decoded = base64.b64decode(self.api_secret)
+            self._hmac_template = hmac.new(secret_decoded, digestmod=hashlib.sha512)
+        mac = self._hmac_template.copy()
+        mac.update(digest)
+        return base64.b64encode(mac.digest()).decode()
+
+    def add_request_hooks(
+        self,
+        before: Optional[Callable[[str, str, Optional[Dict[str, Any]]], None]] = None,
+        after: Optional[Callable[[RequestTiming], None]] = None,
+    ) -> None:
+        """A before hook that raises aborts the request; after-hook errors are swallowed."""
+        if before is not None:
+            self.before_request_hooks.append(before)
+        if after is not None:
+            self.after_request_hooks.append(after)
+
+    def _begin_request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]]) -> RequestTiming:
+        for hook in self.before_request_hooks:
+            hook(method, endpoint, params)
+        return RequestTiming(method, endpoint)
+
+    def _end_request(self, timing: RequestTiming) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.observe(timing)
+        for hook in self.after_request_hooks:
+            with contextlib.suppress(Exception):
+                hook(timing)
+
+    def _retry_policy_for(self, method: str, endpoint: str) -> RetryPolicy:
+        """Per-endpoint override, else the default for GETs and idempotent POSTs."""
+        if endpoint in self.retry_policies:
+            return self.retry_policies[endpoint]
+        if method.upper() == "GET" or endpoint in IDEMPOTENT_POSTS:
+            return self.retry_policy
+        return NO_RETRY
+
+    def _attempt_timeout(
+        self, method: str, endpoint: str, timeout: Optional[Tuple[float, float]] = None
+    ) -> Tuple[float, float]:
+        """(connect, read) timeout for one attempt, clipped to the active deadline."""
+        connect, read = timeout or self.timeout
+        remaining = time_remaining()
+        if remaining is None:
+            return connect, read
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{method} {endpoint} : deadline exceeded")
+        return min(connect, remaining), min(read, remaining)
+
+    def _check_wait(self, method: str, endpoint: str, delay: float) -> None:
+        """Refuse to sleep past the active deadline."""
+        remaining = time_remaining()
+        if remaining is not None and delay >= remaining:
+            raise DeadlineExceeded(f"{method} {endpoint} : deadline exceeded while waiting {delay:.2f}s")
+
+    def _reserve_rate_limit(
         self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
+    ) -> float:
+        """Queue for rate-limit budget; give it back if the wait would bust the deadline."""
+        delay = self.rate_limiter.reserve(endpoint, params)
+        if delay > 0:
+            try:
+                self._check_wait(method, endpoint, delay)
+            except DeadlineExceeded:
+                self.rate_limiter.refund(endpoint, params)
+                raise
+        return delay
+
+    def _url(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+        url = self.base_url + endpoint
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        return url
+
+    def _cache_lookup(
+        self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[str], Optional[CacheEntry]]:
+        """(cache key, cached entry) for a cacheable GET, else (None, None)."""
+        if self.cache is None or method.upper() != "GET":
+            return None, None
+        key = self.cache.key(self.api_key, self._url(endpoint, params), endpoint)
+        return key, (self.cache.get(key) if key is not None else None)
+
+    def _flight_key(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Identity of a GET for coalescing: key, host, endpoint and sorted params."""
+        query = urllib.parse.urlencode(sorted((params or {}).items()))
+        return f"{self.api_key}|{self.base_url}{endpoint}?{query}"
+
+    def _prepare_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[str, Dict[str, str], str]:
+        """Return (url, headers, post_data) for a signed request."""
         params = params or {}
         url = self.base_url + endpoint
         nonce = self._create_nonce()
@@ -66,12 +1137,139 @@ class KrakenFuturesApi:
         elif params:
             url += "?" + urllib.parse.urlencode(params)
 
+        if extra_headers:
+            headers.update(extra_headers)
         headers["Authent"] = self._sign_request(endpoint, nonce, post_data)
+        return url, headers, post_data
+
+
+class KrakenFuturesApi(_KrakenFuturesBase):
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        base_url: str = "https://futures.kraken.com",
+        session: Optional[requests.Session] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_policies: Optional[Dict[str, RetryPolicy]] = None,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        codec: Optional[JsonCodec] = None,
+        cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = _SINGLE_FLIGHT,
+        nonce_source: Optional[NonceSource] = None,
+        transport: Optional[Callable[..., Any]] = None,
+        instrumentation: Optional[Instrumentation] = _INSTRUMENTATION,
+    ) -> None:
+        super().__init__(
+            api_key,
+            api_secret,
+            base_url,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            retry_policies=retry_policies,
+            timeout=timeout,
+            codec=codec,
+            cache=cache,
+            nonce_source=nonce_source,
+            instrumentation=instrumentation,
+        )
+        self._owns_session = session is None
+        self.session = make_session(pool_size) if session is None else session
+        # anything with session.request's signature, e.g. a cassette recorder/replayer
+        self.transport = self.session.request if transport is None else transport
+        # identical concurrent GETs share one request; pass None to disable
+        self.single_flight = single_flight
+
+    # ------------------------------------------------------------------
+    # single universal request method
+    # ------------------------------------------------------------------
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+    ) -> Dict[str, Any]:
+        timing = self._begin_request(method, endpoint, params)
+        start = time.perf_counter()
+        try:
+            cache_key, cached = self._cache_lookup(method, endpoint, params)
+            if cached is not None and cached.is_fresh():
+                timing.cached = True
+                return cached.data
+            extra_headers = cached.conditional_headers() if cached is not None else None
+
+            def fetch() -> Dict[str, Any]:
+                rsp = self._send(method, endpoint, params, timeout, extra_headers, timing)
+                timing.bytes_in = len(rsp.content)
+                if rsp.status_code == 304 and cached is not None:
+                    return self.cache.renew(cache_key, cached)
+                parse_start = time.perf_counter()
+                data = self.codec.loads(rsp.content)
+                timing.parse = time.perf_counter() - parse_start
+                if cache_key is not None:
+                    self.cache.put(cache_key, endpoint, data, rsp.content, rsp.headers)
+                return data
 
-        rsp = requests.request(method, url, headers=headers, data=post_data or None)
-        if not rsp.ok:
-            raise RuntimeError(f"{method} {endpoint} failed : {rsp.text}")
-        return rsp.json()
+            if method.upper() == "GET" and self.single_flight is not None:
+                return self.single_flight.do(self._flight_key(endpoint, params), fetch)
+            return fetch()
+        except BaseException as e:
+            timing.error = e
+            raise
+        finally:
+            timing.total = time.perf_counter() - start
+            self._end_request(timing)
+
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        timeout: Optional[Tuple[float, float]],
+        extra_headers: Optional[Dict[str, str]] = None,
+        timing: Optional[RequestTiming] = None,
+    ) -> requests.Response:
+        """Signed request with rate limiting, retries and deadline; returns the 2xx/3xx response."""
+        timing = timing or RequestTiming(method, endpoint)
+        policy = self._retry_policy_for(method, endpoint)
+        for attempt in range(policy.max_attempts):
+            last = attempt == policy.max_attempts - 1
+            delay = self._reserve_rate_limit(method, endpoint, params)
+            if delay > 0:
+                time.sleep(delay)
+            attempt_timeout = self._attempt_timeout(method, endpoint, timeout)
+            # a fresh nonce and signature for every attempt
+            sign_start = time.perf_counter()
+            url, headers, post_data = self._prepare_request(method, endpoint, params, extra_headers)
+            net_start = time.perf_counter()
+            timing.sign += net_start - sign_start
+            timing.attempts += 1
+            timing.bytes_out += len(post_data)
+            try:
+                rsp = self.transport(
+                    method, url, headers=headers, data=post_data or None, timeout=attempt_timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                timing.network += time.perf_counter() - net_start
+                if last:
+                    raise RuntimeError(f"{method} {endpoint} failed : {e}") from e
+            else:
+                timing.network += time.perf_counter() - net_start
+                timing.status = rsp.status_code
+                if rsp.ok:
+                    remaining = time_remaining()
+                    if method.upper() == "GET" and remaining is not None and remaining <= 0:
+                        raise DeadlineExceeded(f"{method} {endpoint} : deadline exceeded during the response")
+                    return rsp
+                if last or rsp.status_code not in policy.retry_statuses:
+                    raise RuntimeError(f"{method} {endpoint} failed : {rsp.text}")
+            backoff = policy.backoff(attempt)
+            self._check_wait(method, endpoint, backoff)
+            time.sleep(backoff)
+        raise AssertionError("unreachable")
 
     # ------------------------------------------------------------------
     # public endpoints
@@ -95,7 +1293,7 @@ class KrakenFuturesApi:
         return self._request("GET", "/derivatives/api/v3/accounts")
 
     def send_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        return self._request("POST", "/derivatives/api/v3/sendorder", params)
+        return self._request("POST", "/derivatives/api/v3/sendorder", with_cli_ord_id(params))
 
     def edit_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
         return self._request("POST", "/derivatives/api/v3/editorder", params)
@@ -110,6 +1308,7 @@ class KrakenFuturesApi:
         return self._request("POST", "/derivatives/api/v3/cancelallordersafter", params)
 
     def batch_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        params = with_batch_cli_ord_ids(params, self.codec)
         return self._request("POST", "/derivatives/api/v3/batchorder", params)
 
     def get_open_orders(self) -> Dict[str, Any]:
@@ -124,8 +1323,8 @@ class KrakenFuturesApi:
     def get_fills(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         return self._request("GET", "/derivatives/api/v3/fills", params)
 
-    def get_account_log(self) -> Dict[str, Any]:
-        return self._request("GET", "/api/history/v2/account-log")
+    def get_account_log(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return self._request("GET", "/api/history/v2/account-log", params)
 
     def get_transfers(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         return self._request("GET", "/derivatives/api/v3/transfers", params)
@@ -137,6 +1336,73 @@ class KrakenFuturesApi:
         """Return single order status."""
         return self._request("GET", "/derivatives/api/v3/orders", {"order_id": order_id})
 
+    # ------------------------------------------------------------------
+    # streaming iterators
+    # ------------------------------------------------------------------
+    def iter_fills(self, params: Optional[Dict[str, Any]] = None, prefetch: bool = False) -> Iterator[Dict[str, Any]]:
+        """Every fill, newest first, following lastFillTime across pages."""
+        return self._paginate("/derivatives/api/v3/fills", params, prefetch)
+
+    def iter_history(self, params: Optional[Dict[str, Any]] = None, prefetch: bool = False) -> Iterator[Dict[str, Any]]:
+        """Public trade history for params["symbol"], newest first, following lastTime."""
+        return self._paginate("/derivatives/api/v3/history", params, prefetch)
+
+    def iter_account_log(
+        self, params: Optional[Dict[str, Any]] = None, prefetch: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """Account log entries following id cursors (newest first, or oldest first with sort=asc)."""
+        return self._paginate("/api/history/v2/account-log", params, prefetch)
+
+    def _paginate(
+        self, endpoint: str, params: Optional[Dict[str, Any]], prefetch: bool
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield records page by page, holding at most two pages in memory.
+
+        With prefetch the next page is requested on a worker thread while
+        the caller consumes the current one. Records repeated across a page
+        boundary (inclusive time cursors) are skipped.
+        """
+        records_key, id_key, cursor = PAGINATION[endpoint]
+
+        def fetch(page_params: Dict[str, Any]) -> Dict[str, Any]:
+            return self._request("GET", endpoint, page_params)
+
+        params = dict(params or {})
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        seen: set = set()
+        try:
+            resp = fetch(params)
+            while True:
+                records = resp.get(records_key) or []
+                nxt = cursor(params, records, resp) if records else None
+                if nxt == params:
+                    nxt = None
+                pending = None
+                if executor is not None and nxt is not None:
+                    # carry the caller's deadline into the worker thread
+                    pending = executor.submit(contextvars.copy_context().run, fetch, nxt)
+
+                page_ids = set()
+                for record in records:
+                    record_id = record.get(id_key)
+                    page_ids.add(record_id)
+                    if record_id is None or record_id not in seen:
+                        yield record
+
+                if nxt is None or page_ids <= seen:
+                    return
+                seen, params = page_ids, nxt
+                resp = pending.result() if pending is not None else fetch(nxt)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self) -> None:
+        """Release pooled connections (a shared session is left to its owner)."""
+        if self._owns_session:
+            self.session.close()
+
 # ------------------------------------------------------------------
 # quick self-test
 # ------------------------------------------------------------------
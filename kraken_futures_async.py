@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Asyncio Kraken-Futures API client.
+Same endpoints, nonces and signing as KrakenFuturesApi, served as coroutines
+over one shared aiohttp connection pool.
+"""
+import asyncio
+import copy
+import time
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+import aiohttp
+
+from kraken_futures import (
+    DEFAULT_POOL_SIZE,
+    DEFAULT_TIMEOUT,
+    Instrumentation,
+    JsonCodec,
+    NonceSource,
+    PAGINATION,
+    ResponseCache,
+    RateLimiter,
+    RequestTiming,
+    RetryPolicy,
+    _INSTRUMENTATION,
+    _KrakenFuturesBase,
+    _caller_failure,
+    time_remaining,
+    with_batch_cli_ord_ids,
+    with_cli_ord_id,
+)
+
+
+def make_async_session(
+    pool_size: int = DEFAULT_POOL_SIZE, keepalive_timeout: float = 30.0
+) -> aiohttp.ClientSession:
+    """
+    Build a keep-alive aiohttp session capped at pool_size sockets.
+
+    Must be called while an event loop is running. Pass the same session to
+    several clients to fan out many accounts over one pool.
+    """
+    connector = aiohttp.TCPConnector(limit=pool_size, keepalive_timeout=keepalive_timeout)
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={"User-Agent": "Kraken-Futures-Py-Client/1.0"},
+    )
+
+
+_NO_RESULT = object()  # the leading task gave up (cancelled, own deadline); waiters call again
+
+
+class AsyncSingleFlight:
+    """
+    asyncio twin of kraken_futures.SingleFlight for tasks on one event loop.
+    A cancelled leader does not cancel its waiters: one of them leads a
+    fresh call instead.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Any, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        while key in self._flights:
+            flight = self._flights[key]
+            try:
+                result = await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                raise  # this task was cancelled, not the flight
+            except BaseException:
+                self.coalesced += 1
+                raise
+            if result is not _NO_RESULT:
+                self.coalesced += 1
+                return copy.deepcopy(result)
+
+        flight = self._flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except BaseException as e:
+            if _caller_failure(e):
+                flight.set_result(_NO_RESULT)
+            else:
+                flight.set_exception(e)
+                flight.exception()  # mark retrieved when nobody was waiting
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced}
+
+
+_ASYNC_SINGLE_FLIGHT = AsyncSingleFlight()
+
+
+class AsyncKrakenFuturesApi(_KrakenFuturesBase):
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        base_url: str = "https://futures.kraken.com",
+        session: Optional[aiohttp.ClientSession] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_policies: Optional[Dict[str, RetryPolicy]] = None,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        codec: Optional[JsonCodec] = None,
+        cache: Optional[ResponseCache] = None,
+        single_flight: Optional[AsyncSingleFlight] = _ASYNC_SINGLE_FLIGHT,
+        nonce_source: Optional[NonceSource] = None,
+        instrumentation: Optional[Instrumentation] = _INSTRUMENTATION,
+    ) -> None:
+        super().__init__(
+            api_key,
+            api_secret,
+            base_url,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            retry_policies=retry_policies,
+            timeout=timeout,
+            codec=codec,
+            cache=cache,
+            nonce_source=nonce_source,
+            instrumentation=instrumentation,
+        )
+        self._owns_session = session is None
+        self._pool_size = pool_size
+        self.session = session
+        # identical concurrent GETs share one request; pass None to disable
+        self.single_flight = single_flight
+
+    async def __aenter__(self) -> "AsyncKrakenFuturesApi":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    # ------------------------------------------------------------------
+    # single universal request method
+    # ------------------------------------------------------------------
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+    ) -> Dict[str, Any]:
+        timing = self._begin_request(method, endpoint, params)
+        start = time.perf_counter()
+        try:
+            cache_key, cached = self._cache_lookup(method, endpoint, params)
+            if cached is not None and cached.is_fresh():
+                timing.cached = True
+                return cached.data
+            extra_headers = cached.conditional_headers() if cached is not None else None
+
+            async def fetch() -> Dict[str, Any]:
+                status, headers, body = await self._send(method, endpoint, params, timeout, extra_headers, timing)
+                timing.bytes_in = len(body)
+                if status == 304 and cached is not None:
+                    return self.cache.renew(cache_key, cached)
+                parse_start = time.perf_counter()
+                data = self.codec.loads(body)
+                timing.parse = time.perf_counter() - parse_start
+                if cache_key is not None:
+                    self.cache.put(cache_key, endpoint, data, body, headers)
+                return data
+
+            if method.upper() == "GET" and self.single_flight is not None:
+                return await self.single_flight.do(self._flight_key(endpoint, params), fetch)
+            return await fetch()
+        except BaseException as e:
+            timing.error = e
+            raise
+        finally:
+            timing.total = time.perf_counter() - start
+            self._end_request(timing)
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        timeout: Optional[Tuple[float, float]],
+        extra_headers: Optional[Dict[str, str]] = None,
+        timing: Optional[RequestTiming] = None,
+    ) -> Tuple[int, Any, bytes]:
+        """Signed request with rate limiting, retries and deadline; returns (status, headers, body)."""
+        timing = timing or RequestTiming(method, endpoint)
+        if self.session is None:
+            self.session = make_async_session(self._pool_size)
+        policy = self._retry_policy_for(method, endpoint)
+        for attempt in range(policy.max_attempts):
+            last = attempt == policy.max_attempts - 1
+            delay = self._reserve_rate_limit(method, endpoint, params)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            connect, read = self._attempt_timeout(method, endpoint, timeout)
+            client_timeout = aiohttp.ClientTimeout(total=time_remaining(), sock_connect=connect, sock_read=read)
+            # a fresh nonce and signature for every attempt
+            sign_start = time.perf_counter()
+            url, headers, post_data = self._prepare_request(method, endpoint, params, extra_headers)
+            net_start = time.perf_counter()
+            timing.sign += net_start - sign_start
+            timing.attempts += 1
+            timing.bytes_out += len(post_data)
+            try:
+                async with self.session.request(
+                    method, url, headers=headers, data=post_data or None, timeout=client_timeout
+                ) as rsp:
+                    body = await rsp.read()
+                    timing.network += time.perf_counter() - net_start
+                    timing.status = rsp.status
+                    if rsp.status < 400:
+                        return rsp.status, rsp.headers, body
+                    if last or rsp.status not in policy.retry_statuses:
+                        raise RuntimeError(f"{method} {endpoint} failed : {body.decode(errors='replace')}")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                timing.network += time.perf_counter() - net_start
+                if last:
+                    raise RuntimeError(f"{method} {endpoint} failed : {e}") from e
+            backoff = policy.backoff(attempt)
+            self._check_wait(method, endpoint, backoff)
+            await asyncio.sleep(backoff)
+        raise AssertionError("unreachable")
+
+    # ------------------------------------------------------------------
+    # public endpoints
+    # ------------------------------------------------------------------
+    async def get_instruments(self) -> Dict[str, Any]:
+        return await self._request("GET", "/derivatives/api/v3/instruments")
+
+    async def get_tickers(self) -> Dict[str, Any]:
+        return await self._request("GET", "/derivatives/api/v3/tickers")
+
+    async def get_orderbook(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self._request("GET", "/derivatives/api/v3/orderbook", params)
+
+    async def get_history(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self._request("GET", "/derivatives/api/v3/history", params)
+
+    # ------------------------------------------------------------------
+    # private endpoints
+    # ------------------------------------------------------------------
+    async def get_accounts(self) -> Dict[str, Any]:
+        return await self._request("GET", "/derivatives/api/v3/accounts")
+
+    async def send_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._request("POST", "/derivatives/api/v3/sendorder", with_cli_ord_id(params))
+
+    async def edit_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._request("POST", "/derivatives/api/v3/editorder", params)
+
+    async def cancel_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._request("POST", "/derivatives/api/v3/cancelorder", params)
+
+    async def cancel_all_orders(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self._request("POST", "/derivatives/api/v3/cancelallorders", params)
+
+    async def cancel_all_orders_after(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._request("POST", "/derivatives/api/v3/cancelallordersafter", params)
+
+    async def batch_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        params = with_batch_cli_ord_ids(params, self.codec)
+        return await self._request("POST", "/derivatives/api/v3/batchorder", params)
+
+    async def get_open_orders(self) -> Dict[str, Any]:
+        return await self._request("GET", "/derivatives/api/v3/openorders")
+
+    async def get_open_positions(self) -> Dict[str, Any]:
+        return await self._request("GET", "/derivatives/api/v3/openpositions")
+
+    async def get_recent_orders(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self._request("GET", "/derivatives/api/v3/recentorders", params)
+
+    async def get_fills(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self._request("GET", "/derivatives/api/v3/fills", params)
+
+    async def get_account_log(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self._request("GET", "/api/history/v2/account-log", params)
+
+    async def get_transfers(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self._request("GET", "/derivatives/api/v3/transfers", params)
+
+    async def get_notifications(self) -> Dict[str, Any]:
+        return await self._request("GET", "/derivatives/api/v3/notifications")
+
+    async def get_order(self, order_id: str) -> Dict[str, Any]:
+        """Return single order status."""
+        return await self._request("GET", "/derivatives/api/v3/orders", {"order_id": order_id})
+
+    # ------------------------------------------------------------------
+    # streaming iterators
+    # ------------------------------------------------------------------
+    def iter_fills(
+        self, params: Optional[Dict[str, Any]] = None, prefetch: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Every fill, newest first, following lastFillTime across pages."""
+        return self._paginate("/derivatives/api/v3/fills", params, prefetch)
+
+    def iter_history(
+        self, params: Optional[Dict[str, Any]] = None, prefetch: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Public trade history for params["symbol"], newest first, following lastTime."""
+        return self._paginate("/derivatives/api/v3/history", params, prefetch)
+
+    def iter_account_log(
+        self, params: Optional[Dict[str, Any]] = None, prefetch: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Account log entries following id cursors (newest first, or oldest first with sort=asc)."""
+        return self._paginate("/api/history/v2/account-log", params, prefetch)
+
+    async def _paginate(
+        self, endpoint: str, params: Optional[Dict[str, Any]], prefetch: bool
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async twin of KrakenFuturesApi._paginate; prefetch runs as a task."""
+        records_key, id_key, cursor = PAGINATION[endpoint]
+        params = dict(params or {})
+        seen: set = set()
+        pending: Optional[asyncio.Task] = None
+        try:
+            resp = await self._request("GET", endpoint, params)
+            while True:
+                records = resp.get(records_key) or []
+                nxt = cursor(params, records, resp) if records else None
+                if nxt == params:
+                    nxt = None
+                if prefetch and nxt is not None:
+                    pending = asyncio.ensure_future(self._request("GET", endpoint, nxt))
+
+                page_ids = set()
+                for record in records:
+                    record_id = record.get(id_key)
+                    page_ids.add(record_id)
+                    if record_id is None or record_id not in seen:
+                        yield record
+
+                if nxt is None or page_ids <= seen:
+                    return
+                seen, params = page_ids, nxt
+                if pending is not None:
+                    resp, pending = await pending, None
+                else:
+                    resp = await self._request("GET", endpoint, nxt)
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def close(self) -> None:
+        """Release pooled connections (a shared session is left to its owner)."""
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+# ------------------------------------------------------------------
+# quick self-test
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    import os
+
+    KEY = os.getenv("KRAKEN_FUTURES_KEY", "YOUR_API_KEY")
+    SEC = os.getenv("KRAKEN_FUTURES_SECRET", "YOUR_API_SECRET")
+
+    async def main() -> None:
+        async with AsyncKrakenFuturesApi(KEY, SEC) as api:
+            tickers, accounts = await asyncio.gather(api.get_tickers(), api.get_accounts())
+            print("--- public tickers ---")
+            print(tickers["tickers"][:2])
+            print("\n--- private accounts ---")
+            print(accounts)
+
+    asyncio.run(main())
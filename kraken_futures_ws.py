@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Kraken-Futures WebSocket client.
+Runs alongside KrakenFuturesApi: public feeds (ticker, book, ...) and the
+signed private feeds (fills, open_orders, open_positions, ...) are pushed
+to callbacks from a background thread, with automatic reconnect and
+resubscribe.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import websocket
+
+from kraken_futures import JsonCodec, _KrakenFuturesBase, default_codec
+
+logger = logging.getLogger("KrakenFuturesWS")
+
+WS_URL = "wss://futures.kraken.com/ws/v1"
+
+PUBLIC_FEEDS = frozenset({"ticker", "ticker_lite", "book", "trade", "heartbeat"})
+PRIVATE_FEEDS = frozenset({
+    "fills",
+    "open_orders",
+    "open_orders_verbose",
+    "open_positions",
+    "balances",
+    "account_log",
+    "notifications_auth",
+})
+
+Callback = Callable[[Dict[str, Any]], None]
+
+
+class KrakenFuturesWebSocket:
+    """
+    Push-feed client.
+
+    subscribe() registers a callback for a feed (and product ids for public
+    feeds). Snapshot messages such as "fills_snapshot" or "book_snapshot"
+    are delivered to the callbacks of their base feed, so a handler sees
+    the snapshot first and then every update. Subscriptions survive
+    reconnects; on_connect callbacks fire after each (re)connect so callers
+    can resync anything they may have missed while disconnected.
+    """
+
+    def __init__(
+        self,
+        api: Optional[_KrakenFuturesBase] = None,
+        url: str = WS_URL,
+        codec: Optional[JsonCodec] = None,
+        ping_interval: float = 30.0,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+    ) -> None:
+        self.api = api
+        self.url = url
+        self.codec = codec or (api.codec if api is not None else default_codec())
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self._subscriptions: Dict[Tuple[str, Tuple[str, ...]], List[Callback]] = {}
+        self._on_connect: List[Callable[[], None]] = []
+        self._on_disconnect: List[Callable[[], None]] = []
+        self._lock = threading.RLock()
+        self._ws: Optional[websocket.WebSocket] = None
+        self._challenge: Optional[str] = None
+        self._signed_challenge: Optional[str] = None
+        self._challenge_requested = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.connected = threading.Event()
+
+    # ------------------------------------------------------------------
+    # public interface
+    # ------------------------------------------------------------------
+    def subscribe(self, feed: str, callback: Callback, product_ids: Optional[List[str]] = None) -> None:
+        if feed in PRIVATE_FEEDS and self.api is None:
+            raise ValueError(f"feed '{feed}' needs API credentials")
+        key = (feed, tuple(sorted(p.upper() for p in product_ids or [])))
+        with self._lock:
+            first = key not in self._subscriptions
+            self._subscriptions.setdefault(key, []).append(callback)
+            if first and self._ws is not None:
+                self._send_subscription(key)
+
+    def resubscribe(self, feed: str, product_ids: Optional[List[str]] = None) -> None:
+        """
+        Unsubscribe and subscribe a public feed again, keeping its callbacks,
+        so the server sends a fresh snapshot (e.g. a sequenced book_snapshot
+        after a gap). A no-op while disconnected: the reconnect resubscribes.
+        """
+        if feed in PRIVATE_FEEDS:
+            raise ValueError(f"resubscribe only supports public feeds, not '{feed}'")
+        key = (feed, tuple(sorted(p.upper() for p in product_ids or [])))
+        with self._lock:
+            if key not in self._subscriptions or self._ws is None:
+                return
+            message: Dict[str, Any] = {"event": "unsubscribe", "feed": feed}
+            if key[1]:
+                message["product_ids"] = list(key[1])
+            self._send(message)
+            self._send_subscription(key)
+
+    def on_connect(self, callback: Callable[[], None]) -> None:
+        self._on_connect.append(callback)
+
+    def on_disconnect(self, callback: Callable[[], None]) -> None:
+        self._on_disconnect.append(callback)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="kf-websocket", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        with self._lock:
+            ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ------------------------------------------------------------------
+    # connection loop
+    # ------------------------------------------------------------------
+    def _run(self) -> None:
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            try:
+                self._connect()
+                delay = self.reconnect_delay
+                self._read_loop()
+            except Exception as e:
+                if not self._stop.is_set():
+                    logger.warning(f"WebSocket dropped: {e}")
+            finally:
+                self._disconnect()
+            if self._stop.wait(random.uniform(0.5, 1.0) * delay):
+                break
+            delay = min(self.max_reconnect_delay, delay * 2)
+
+    def _connect(self) -> None:
+        ws = websocket.create_connection(self.url, timeout=self.ping_interval)
+        with self._lock:
+            self._ws = ws
+            self._challenge = self._signed_challenge = None
+            self._challenge_requested = False
+            for key in self._subscriptions:
+                self._send_subscription(key)
+        self.connected.set()
+        logger.info(f"WebSocket connected: {self.url}")
+        for callback in self._on_connect:
+            self._safe_call(callback)
+
+    def _disconnect(self) -> None:
+        was_connected = self.connected.is_set()
+        self.connected.clear()
+        with self._lock:
+            ws, self._ws = self._ws, None
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        if was_connected:
+            for callback in self._on_disconnect:
+                self._safe_call(callback)
+
+    def _read_loop(self) -> None:
+        ws = self._ws
+        while not self._stop.is_set():
+            try:
+                raw = ws.recv()
+            except websocket.WebSocketTimeoutException:
+                # quiet feed: keep the connection alive (Kraken drops idle sockets after 60 s)
+                ws.ping()
+                continue
+            if not raw:
+                raise ConnectionError("connection closed by server")
+            self._dispatch(self.codec.loads(raw))
+
+    # ------------------------------------------------------------------
+    # messages
+    # ------------------------------------------------------------------
+    def _send(self, message: Dict[str, Any]) -> None:
+        # caller holds self._lock
+        self._ws.send(self.codec.dumps(message))
+
+    def _send_subscription(self, key: Tuple[str, Tuple[str, ...]]) -> None:
+        # caller holds self._lock
+        feed, product_ids = key
+        if feed not in PRIVATE_FEEDS:
+            message: Dict[str, Any] = {"event": "subscribe", "feed": feed}
+            if product_ids:
+                message["product_ids"] = list(product_ids)
+            self._send(message)
+        elif self._signed_challenge is not None:
+            self._send({
+                "event": "subscribe",
+                "feed": feed,
+                "api_key": self.api.api_key,
+                "original_challenge": self._challenge,
+                "signed_challenge": self._signed_challenge,
+            })
+        elif not self._challenge_requested:
+            # private feeds go out once the challenge answer arrives
+            self._challenge_requested = True
+            self._send({"event": "challenge", "api_key": self.api.api_key})
+
+    def _dispatch(self, msg: Dict[str, Any]) -> None:
+        event = msg.get("event")
+        if event == "challenge":
+            with self._lock:
+                self._challenge = msg["message"]
+                self._signed_challenge = self.api.sign_challenge(self._challenge)
+                for key in self._subscriptions:
+                    if key[0] in PRIVATE_FEEDS:
+                        self._send_subscription(key)
+            return
+        if event in ("error", "alert"):
+            logger.error(f"WebSocket {event}: {msg.get('message', msg)}")
+            return
+        if event is not None:
+            # info / subscribed / unsubscribed acknowledgements
+            return
+
+        feed = msg.get("feed", "")
+        if feed.endswith("_snapshot"):
+            feed = feed[: -len("_snapshot")]
+        product_id = str(msg.get("product_id", "")).upper()
+        with self._lock:
+            matches = [
+                cbs
+                for (sub_feed, product_ids), cbs in self._subscriptions.items()
+                if sub_feed == feed and (not product_ids or not product_id or product_id in product_ids)
+            ]
+        for callbacks in matches:
+            for callback in callbacks:
+                self._safe_call(callback, msg)
+
+    @staticmethod
+    def _safe_call(callback: Callable[..., None], *args: Any) -> None:
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"WebSocket callback {getattr(callback, '__name__', callback)} failed: {e}")
+
+# ------------------------------------------------------------------
+# quick self-test
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    import os
+    from kraken_futures import KrakenFuturesApi
+
+    logging.basicConfig(level=logging.INFO)
+    KEY = os.getenv("KRAKEN_FUTURES_KEY")
+    SEC = os.getenv("KRAKEN_FUTURES_SECRET")
+
+    feed = KrakenFuturesWebSocket(KrakenFuturesApi(KEY, SEC) if KEY and SEC else None)
+    feed.subscribe("ticker", print, ["PF_XBTUSD"])
+    if KEY and SEC:
+        feed.subscribe("open_positions", print)
+        feed.subscribe("fills", print)
+    feed.start()
+    time.sleep(15)
+    feed.stop()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Prometheus text-format metrics.
+Labelled counters, gauges and histograms, a registry that renders them
+(plus collector callbacks evaluated at scrape time) in the 0.0.4
+exposition format, and a small threaded HTTP endpoint serving /metrics.
+"""
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def render_family(name: str, kind: str, help_text: str, samples: Iterable[Sample]) -> List[str]:
+    """HELP / TYPE header plus one line per (labels, value) sample."""
+    lines = [f"# HELP {name} {_escape(help_text)}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.label_names, key))
+
+    def render(self) -> List[str]:
+        with self._lock:
+            samples = [(self._labels(key), value) for key, value in self._values.items()]
+        return render_family(self.name, self.kind, self.help, samples)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram, for histogram_quantile() on the server side."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.help)}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        for key, counts, total, count in items:
+            labels = self._labels(key)
+            for bound, n in zip(self.buckets, counts):
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': le})} {n}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Named metrics plus collectors. A collector is a callable returning
+    exposition lines (see render_family), for values that are cheaper to
+    read at scrape time than to push on every change. A collector that
+    raises is skipped for that scrape.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric '{metric.name}' already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(
+        self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception:
+                continue
+        return "\n".join(lines) + "\n"
+
+
+def instrumentation_lines(snapshot: Dict[str, Dict[str, Any]], prefix: str = "kraken_api") -> List[str]:
+    """
+    Render an Instrumentation snapshot: per-endpoint, per-phase latency as a
+    summary (p50/p90/p99 quantiles, _sum, _count) plus request, error,
+    retry and byte counters.
+    """
+    quantiles = []
+    sums = []
+    counts = []
+    for endpoint, stats in snapshot.items():
+        for phase in ("total", "sign", "network", "parse"):
+            hist = stats[phase]
+            labels = {"endpoint": endpoint, "phase": phase}
+            for q, label in (("p50", "0.5"), ("p90", "0.9"), ("p99", "0.99")):
+                quantiles.append(({**labels, "quantile": label}, hist[q]))
+            sums.append((labels, hist["mean"] * hist["count"]))
+            counts.append((labels, hist["count"]))
+
+    name = f"{prefix}_request_seconds"
+    lines = [f"# HELP {name} Request latency by endpoint and phase", f"# TYPE {name} summary"]
+    lines += [f"{name}{_format_labels(labels)} {_format_value(v)}" for labels, v in quantiles]
+    lines += [f"{name}_sum{_format_labels(labels)} {_format_value(v)}" for labels, v in sums]
+    lines += [f"{name}_count{_format_labels(labels)} {_format_value(v)}" for labels, v in counts]
+    for field, help_text in (
+        ("requests", "Requests by endpoint"),
+        ("errors", "Failed requests by endpoint"),
+        ("retries", "Retried attempts by endpoint"),
+        ("cache_hits", "Requests served from the response cache"),
+        ("bytes_in", "Response bytes received"),
+        ("bytes_out", "Request body bytes sent"),
+    ):
+        samples = [({"endpoint": endpoint}, stats[field]) for endpoint, stats in snapshot.items()]
+        lines += render_family(f"{prefix}_{field}_total", "counter", help_text, samples)
+    return lines
+
+
+class MetricsServer:
+    """
+    Serves registry.render() at GET /metrics from a daemon thread. Binds to
+    loopback unless host says otherwise; the metrics include account
+    equity and positions, so exposing them on every interface ("0.0.0.0")
+    should be a deliberate choice.
+    """
+
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = "127.0.0.1") -> None:
+        self.registry = registry
+        self.httpd = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.registry = registry
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "MetricsServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
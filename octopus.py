@@ -10,10 +10,17 @@ import os
 import sys
 import time
 import logging
-import requests
-import json
 import math
-from kraken_futures import KrakenFuturesApi
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from kraken_futures import _INSTRUMENTATION, deadline, make_session, time_remaining, with_cli_ord_id
+from cassette import open_transport
+from instruments import index_by_symbol
+from metrics import MetricsRegistry, MetricsServer, instrumentation_lines, render_family
+from reconcile_events import ReconcileTrigger
+from batch_order import BatchOrderBuilder
+from client_pool import ClientPool
 from dotenv import load_dotenv
 
 # --- Configuration ---
@@ -39,9 +46,20 @@ KEYS = {
 }
 
 SYMBOL = "FF_XBTUSD_260227".upper()
-UPDATE_INTERVAL = 600
-STATE_FILE = "order_state.json"
+UPDATE_INTERVAL = 600      # seconds, safety-net poll; push events wake the loop sooner
 SIZE_TOLERANCE = 0.05
+POOL_SIZE = 4              # sockets shared by every account
+FLUSH_DEADLINE = 30        # seconds, whole force_flush (cancel all + snipes)
+RECONCILE_DEADLINE = 90    # seconds, one account's fetch-and-reconcile step (best-effort, see deadline())
+CYCLE_DEADLINE = 120       # seconds, one whole cycle; run_parallel stops waiting at this point
+BASE_URL = os.getenv("KRAKEN_FUTURES_URL", "https://futures.kraken.com")  # e.g. a local sim_server.py
+CASSETTE = os.getenv("CASSETTE")                      # path of a .jsonl.gz cassette
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "record")  # record | replay
+CASSETTE_LATENCY = float(os.getenv("CASSETTE_LATENCY", "0"))  # replay delay scale
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))  # Prometheus /metrics, 0 = off
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")  # set 0.0.0.0 to expose beyond localhost
+PUSH_FEED = os.getenv("PUSH_FEED", "1") == "1"         # 0 = plain polling (e.g. against sim_server.py)
+WS_URL = os.getenv("KRAKEN_FUTURES_WS_URL", "wss://futures.kraken.com/ws/v1")
 
 logging.basicConfig(
     level=logging.INFO,
@@ -52,87 +70,132 @@ logger = logging.getLogger("EqualOpp")
 
 class EqualOpportunityBot:
     def __init__(self):
+        session = make_session(POOL_SIZE, pool_block=True)
+        transport = None
+        if CASSETTE:
+            transport = open_transport(CASSETTE, CASSETTE_MODE, session, CASSETTE_LATENCY)
+            logger.info(f"Cassette {CASSETTE_MODE}: {CASSETTE}")
+        self.pool = ClientPool(pool_size=POOL_SIZE, base_url=BASE_URL, session=session, transport=transport)
+        self.init_metrics()
         self.clients = {}
         for name, creds in KEYS.items():
             if not creds["key"] or not creds["secret"]:
                 logger.error(f"Missing keys for {name} account.")
                 sys.exit(1)
-            self.clients[name] = KrakenFuturesApi(creds["key"], creds["secret"])
+            self.clients[name] = self.pool.add(name, creds["key"], creds["secret"])
         
-        self.state = self.load_state()
+        self.trigger = ReconcileTrigger()
+        self.feeds = {}
+        # one worker per task key (equity and reconcile per account, plus the
+        # mark price); run_parallel never runs two tasks for one key at once
+        self.executor = ThreadPoolExecutor(max_workers=2 * len(KEYS) + 1, thread_name_prefix="account")
+        self.busy = set()
+        self.busy_lock = threading.Lock()
+
         self.tick_size = 0.5
         self.qty_step = 0.0001
         self.min_qty = 0.0001
+        self.instruments = self.pool.instruments
         self.fetch_specs()
+        self.instruments.start()
         
         # --- Startup Cleanup ---
         logger.info("--- STARTUP: Wiping Orders & Positions ---")
         for name, client in self.clients.items():
             self.force_flush(name, client)
             self.close_open_position(name, client)
-            self.state[name] = []
-        self.save_state()
 
-    def fetch_specs(self):
-        try:
-            url = "https://futures.kraken.com/derivatives/api/v3/instruments"
-            resp = requests.get(url).json()
-            if "instruments" in resp:
-                for inst in resp["instruments"]:
-                    if inst["symbol"].upper() == SYMBOL:
-                        self.tick_size = float(inst.get("tickSize", 0.5))
-                        precision = inst.get("contractValueTradePrecision", 3)
-                        self.qty_step = 10 ** (-int(precision))
-                        self.min_qty = self.qty_step
-                        logger.info(f"SPECS | Tick: {self.tick_size} | QtyStep: {self.qty_step}")
-                        return
-        except Exception as e:
-            logger.warning(f"Spec Fetch Failed, using defaults: {e}")
+    def init_metrics(self):
+        m = self.metrics = MetricsRegistry()
+        self.m_cycle = m.histogram(
+            "eo_cycle_duration_seconds", "Wall time of one reconcile cycle",
+            buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 90, 120, 180),
+        )
+        self.m_placed = m.counter("eo_orders_placed_total", "Orders accepted by the exchange", ("account",))
+        self.m_cancelled = m.counter("eo_orders_cancelled_total", "Orders cancelled by the bot", ("account",))
+        self.m_edited = m.counter("eo_orders_edited_total", "Orders amended in place", ("account",))
+        self.m_drift = m.counter(
+            "eo_grid_drift_total", "Differences between live and desired grid, by reason", ("account", "reason")
+        )
+        self.m_equity = m.gauge("eo_equity_usd", "Margin equity", ("account",))
+        self.m_position = m.gauge("eo_position_size", "Open position size in contracts", ("account",))
+        self.m_stop_distance = m.gauge(
+            "eo_stop_distance_ratio", "Distance from mark price to the stop, as a fraction of mark", ("account",)
+        )
+        m.add_collector(lambda: instrumentation_lines(_INSTRUMENTATION.snapshot()))
+        m.add_collector(lambda: render_family(
+            "kraken_rate_limit_headroom", "gauge", "Rate-limit tokens left per account and cost pool",
+            [({"account": name, "pool": pool}, tokens)
+             for name, pools in self.pool.headroom().items() for pool, tokens in pools.items()],
+        ))
+        if METRICS_PORT:
+            MetricsServer(m, METRICS_PORT, METRICS_HOST).start()
+            logger.info(f"Metrics on {METRICS_HOST}:{METRICS_PORT}/metrics")
 
-    def load_state(self):
-        if os.path.exists(STATE_FILE):
-            try:
-                with open(STATE_FILE, "r") as f:
-                    return json.load(f)
-            except Exception:
-                return {}
-        return {}
+    def start_feeds(self):
+        """One private WebSocket per account; its events wake run() early."""
+        if not PUSH_FEED:
+            return
+        from kraken_futures_ws import KrakenFuturesWebSocket
+        for name, client in self.clients.items():
+            feed = self.feeds[name] = KrakenFuturesWebSocket(client, url=WS_URL)
+            self.trigger.attach(name, feed, SYMBOL)
+            feed.start()
+        logger.info(f"Push feeds started for {', '.join(self.feeds)}")
 
-    def save_state(self):
+    def get_mark_price(self):
         try:
-            with open(STATE_FILE, "w") as f:
-                json.dump(self.state, f, indent=4)
+            tickers = index_by_symbol(self.pool.public.get_tickers().get("tickers", []))
+            return float(tickers[SYMBOL]["markPrice"])
         except Exception:
-            pass
+            return 0.0
+
+    def fetch_specs(self):
+        try:
+            self.instruments.refresh()
+            spec = self.instruments.get(SYMBOL)
+            if spec is not None:
+                self.tick_size = spec.tick_size
+                self.qty_step = spec.qty_step
+                self.min_qty = self.qty_step
+                logger.info(f"SPECS | Tick: {self.tick_size} | QtyStep: {self.qty_step}")
+        except Exception as e:
+            logger.warning(f"Spec Fetch Failed, using defaults: {e}")
 
     def round_price(self, price):
+        spec = self.instruments.get(SYMBOL)
+        if spec is not None:
+            return spec.round_price(price)
         steps = round(price / self.tick_size)
         return steps * self.tick_size
 
     def round_qty(self, qty):
+        spec = self.instruments.get(SYMBOL)
+        if spec is not None:
+            return spec.round_qty(qty)
         steps = round(qty / self.qty_step)
         rounded = steps * self.qty_step
         return max(rounded, self.min_qty)
 
     def get_equity(self, client):
+        """Margin equity, or None if it could not be fetched (never a made-up 0)."""
         try:
             acc = client.get_accounts()
             if "flex" in acc.get("accounts", {}):
                 return float(acc["accounts"]["flex"].get("marginEquity", 0))
             first = list(acc.get("accounts", {}).values())[0]
             return float(first.get("marginEquity", 0))
-        except Exception:
-            return 0.0
+        except Exception as e:
+            logger.warning(f"Equity Fetch Failed: {e}")
+            return None
 
     def get_position(self, client):
-        try:
-            pos = client.get_open_positions()
-            for p in pos.get("openPositions", []):
-                if p["symbol"].upper() == SYMBOL:
-                    return float(p["size"])
-            return 0.0
-        except Exception:
-            return 0.0
+        """Position size; a failed fetch raises rather than reading as flat."""
+        pos = client.get_open_positions()
+        for p in pos.get("openPositions", []):
+            if p["symbol"].upper() == SYMBOL:
+                return float(p["size"])
+        return 0.0
 
     def close_open_position(self, name, client):
         try:
@@ -161,57 +224,62 @@ class EqualOpportunityBot:
     def force_flush(self, name, client):
         """
         Modified to use Dictionary payloads for cancellation to avoid TypeErrors.
+        Bounded by FLUSH_DEADLINE (or a tighter deadline already in force).
         """
+        with deadline(FLUSH_DEADLINE):
+            self._force_flush(name, client)
+
+    def _force_flush(self, name, client):
         # 1. Blanket Cancel (Try sending explicit Dict)
         try:
             resp = client.cancel_all_orders({"symbol": SYMBOL})
             logger.info(f"{name}: Cancel All Resp: {resp}")
+            self.m_cancelled.inc(len(resp.get("cancelStatus", {}).get("cancelledOrders", [])), account=name)
         except Exception as e:
             logger.error(f"{name}: Cancel All Fail: {e}")
-        
-        time.sleep(1.0)
 
-        # 2. Sniper Cancel (Iterate and kill survivors)
+        # let the cancels settle, without sleeping through the deadline
+        remaining = time_remaining()
+        time.sleep(1.0 if remaining is None else max(0.0, min(1.0, remaining)))
+
+        # 2. Sniper Cancel (kill survivors in a single batch)
         try:
             open_orders = client.get_open_orders()
             if "openOrders" in open_orders:
                 survivors = [o for o in open_orders["openOrders"] if o["symbol"].upper() == SYMBOL]
                 if survivors:
                     logger.info(f"{name}: Sniping {len(survivors)} stuck orders...")
+                    batch = BatchOrderBuilder(client)
                     for o in survivors:
-                        try:
-                            # Try passing Dict payload
-                            resp = client.cancel_order({"order_id": o["order_id"]})
-                            
-                            # Fallback logging
-                            if "error" in str(resp):
-                                logger.warning(f"Sniper Retry {o['order_id']}")
-                            else:
-                                logger.info(f"{name}: Cancelled {o['order_id']}")
-                                
-                        except Exception as inner_e:
-                            logger.error(f"{name}: Sniper ID {o['order_id']} Error: {inner_e}")
+                        batch.cancel(o["order_id"], order_id=o["order_id"])
+                    self.trigger.expect_own(name, batch.order_refs().values())
+                    for order_id, result in batch.execute().items():
+                        if result.get("status") == "cancelled":
+                            logger.info(f"{name}: Cancelled {order_id}")
+                            self.m_cancelled.inc(account=name)
+                        else:
+                            self.trigger.forget_own(name, [order_id])
+                            logger.warning(f"{name}: Sniper ID {order_id} Error: {result}")
         except Exception as e:
             logger.error(f"{name}: Sniper Check Fail: {e}")
 
-    def place_grid(self, name, client, config, base_equity):
-        if base_equity <= 0: return
-
-        current_pos = self.get_position(client)
+    def desired_grid(self, config, base_equity, current_pos):
+        """
+        Limit payloads for the levels the position has not already filled,
+        plus the reduce-only stop payload (sized later, once the live limits
+        are known).
+        """
         base_value_per_level = base_equity / 10.0
-        
         levels = sorted(config["levels"], reverse=(config["side"] == "buy"))
-        
+
         limit_payloads = []
-        pending_limit_size = 0.0
-        
         filled_qty_tracker = current_pos
 
         for raw_price in levels:
             price = self.round_price(raw_price)
             ideal_qty = self.round_qty(base_value_per_level / price)
-            
-            if filled_qty_tracker >= (ideal_qty * 0.9): 
+
+            if filled_qty_tracker >= (ideal_qty * 0.9):
                 filled_qty_tracker -= ideal_qty
             else:
                 limit_payloads.append({
@@ -219,105 +287,287 @@ class EqualOpportunityBot:
                     "symbol": SYMBOL,
                     "side": config["side"],
                     "size": ideal_qty,
-                    "limitPrice": price,
-                    "meta_type": "limit"
+                    "limitPrice": price
                 })
-                pending_limit_size += ideal_qty
 
-        stop_price = self.round_price(config["stop"])
-        total_risk_size = self.round_qty(current_pos + pending_limit_size)
-        
-        orders_to_send = limit_payloads
-        orders_to_send.append({
+        return limit_payloads, self.stop_payload(config)
+
+    def stop_payload(self, config):
+        return {
             "orderType": "stp",
             "symbol": SYMBOL,
             "side": config["stop_side"],
-            "size": total_risk_size,
-            "stopPrice": stop_price,
-            "reduceOnly": True,
-            "meta_type": "stop"
-        })
-
-        logger.info(f"{name} | Pos: {current_pos:.4f} | Placing {len(limit_payloads)} limits + Stop {total_risk_size:.4f}")
-
-        new_state = []
-        for order in orders_to_send:
-            try:
-                meta = order.pop("meta_type")
-                resp = client.send_order(order)
-                if "sendStatus" in resp and "order_id" in resp["sendStatus"]:
-                    new_state.append({
-                        "id": resp["sendStatus"]["order_id"],
-                        "type": meta,
-                        "price": order.get("limitPrice", order.get("stopPrice")),
-                        "size": order["size"]
-                    })
-            except Exception as e:
-                logger.error(f"Order Excep: {e}")
-        
-        self.state[name] = new_state
-        self.save_state()
+            "stopPrice": self.round_price(config["stop"]),
+            "reduceOnly": True
+        }
 
-    def check_integrity(self, name, open_orders, current_pos, min_equity, config):
-        saved = self.state.get(name, [])
-        if not saved: return False
-        
-        live_map = {o["order_id"]: o for o in open_orders.get("openOrders", [])}
-        
-        limit_size_sum = 0.0
-        for s in saved:
-            if s["type"] == "limit":
-                if s["id"] not in live_map:
-                    logger.info(f"{name}: Limit {s['id']} filled/gone. Resetting.")
-                    return False
-                limit_size_sum += float(live_map[s["id"]]["size"])
-
-        target_stop_size = self.round_qty(current_pos + limit_size_sum)
-        
-        stop_found = False
-        for s in saved:
-            if s["type"] == "stop":
-                if s["id"] not in live_map:
-                    logger.info(f"{name}: Stop {s['id']} missing. Resetting.")
-                    return False
-                
-                live_size = float(live_map[s["id"]]["size"])
-                if abs(live_size - target_stop_size) / live_size > SIZE_TOLERANCE:
-                     logger.info(f"{name}: Stop Size Drift. Live: {live_size}, Target: {target_stop_size}. Resetting.")
-                     return False
-                stop_found = True
-        
-        if not stop_found:
-            return False
+    def drifted(self, live_size, target_size, tolerance):
+        return abs(live_size - target_size) > max(target_size * tolerance, self.qty_step / 2)
+
+    def reconcile_grid(self, name, client, config, base_equity, open_orders, current_pos, resize=False):
+        """
+        Bring the live orders in line with desired_grid() using the fewest
+        instructions: keep orders that match by side, price and size, edit
+        the ones whose size (or stop price) is off, send what is missing and
+        cancel the rest, all in one batch. Sends and edits go ahead of
+        cancels, so an existing stop is only removed once its replacement is
+        in. A stop that is off is amended on its own via resize_stop before
+        the batch goes out. Limit sizes within SIZE_TOLERANCE are left alone
+        unless resize is set (equity moved), in which case every order is
+        brought to its exact size. With base_equity None (equity unknown this
+        cycle) the live limits are kept as they are and only the stop is
+        maintained. Returns the number of instructions sent.
+        """
+        if base_equity is not None and base_equity <= 0: return 0
 
-        return True
+        if base_equity is None:
+            limits, stop = None, self.stop_payload(config)
+        else:
+            limits, stop = self.desired_grid(config, base_equity, current_pos)
+        tolerance = 0.0 if resize else SIZE_TOLERANCE
+
+        live_limits = {}
+        live_stops = []
+        strays = []
+        for o in open_orders.get("openOrders", []):
+            if o["symbol"].upper() != SYMBOL:
+                continue
+            if o.get("orderType") == "lmt" and o["side"] == config["side"]:
+                price = self.round_price(float(o["limitPrice"]))
+                if price in live_limits:
+                    strays.append(o)
+                else:
+                    live_limits[price] = o
+            elif o.get("orderType") == "stop" and o["side"] == config["stop_side"] and o.get("reduceOnly"):
+                live_stops.append(o)
+            else:
+                strays.append(o)
+
+        if limits is None:
+            limits = [
+                {"limitPrice": price, "size": float(o.get("filledSize", 0)) + float(o["unfilledSize"])}
+                for price, o in live_limits.items()
+            ]
+
+        batch = BatchOrderBuilder(client)
+        plan = {}        # tag -> send / edit / cancel
+        pending_limit_size = 0.0
+
+        def drift(reason):
+            self.m_drift.inc(account=name, reason=reason)
+
+        for i, order in enumerate(limits):
+            price = order["limitPrice"]
+            o = live_limits.pop(price, None)
+            tag = f"limit-{i}"
+            if o is None:
+                drift("limit_missing")
+                batch.send(tag, order)
+                plan[tag] = "send"
+                pending_limit_size += order["size"]
+                continue
+            filled = float(o.get("filledSize", 0))
+            if self.drifted(filled + float(o["unfilledSize"]), order["size"], tolerance) and order["size"] > filled:
+                drift("limit_size")
+                batch.edit(tag, order_id=o["order_id"], size=order["size"])
+                plan[tag] = "edit"
+                pending_limit_size += order["size"] - filled
+            else:
+                pending_limit_size += float(o["unfilledSize"])
+        # levels the position has since covered, or dropped from the config
+        strays.extend(live_limits.values())
+
+        # the stop always tracks position + pending limits exactly, and is
+        # fixed straight away with its own call rather than in the batch
+        stop = {**stop, "size": self.round_qty(current_pos + pending_limit_size)}
+        stop_size, stop_price = stop["size"], stop["stopPrice"]
+        stop_resized = False
+        if not live_stops:
+            drift("stop_missing")
+            batch.send("stop", stop)
+            plan["stop"] = "send"
+        else:
+            o = live_stops.pop(0)
+            strays.extend(live_stops)
+            live_size = float(o["unfilledSize"])
+            if self.round_price(float(o["stopPrice"])) != stop_price or self.drifted(live_size, stop_size, 0.0):
+                drift("stop_drift")
+                logger.info(f"{name}: Stop Drift. Live: {live_size} @ {o['stopPrice']}, Target: {stop_size} @ {stop_price}")
+                self.resize_stop(name, client, o, stop)
+                stop_resized = True
+
+        for i, o in enumerate(strays):
+            drift("stray")
+            tag = f"cancel-{i}"
+            batch.cancel(tag, order_id=o["order_id"])
+            plan[tag] = "cancel"
+
+        if not len(batch):
+            if stop_resized:
+                return 1
+            logger.info(f"{name}: OK. Pos: {current_pos:.4f}")
+            return 0
+
+        counts = {a: sum(1 for p in plan.values() if p == a) for a in ("send", "edit", "cancel")}
+        logger.info(
+            f"{name} | Pos: {current_pos:.4f} | Diff: {counts['send']} send, {counts['edit']} edit, "
+            f"{counts['cancel']} cancel | Stop {stop_size:.4f}"
+        )
+
+        refs = batch.order_refs()
+        self.trigger.expect_own(name, refs.values())
+        for tag, result in batch.execute().items():
+            action = plan[tag]
+            status = result.get("status")
+            if action == "send" and status == "placed" and "order_id" in result:
+                self.m_placed.inc(account=name)
+            elif action == "edit" and status == "edited":
+                self.m_edited.inc(account=name)
+            elif action == "cancel" and status == "cancelled":
+                self.m_cancelled.inc(account=name)
+            else:
+                self.trigger.forget_own(name, [refs[tag]])
+                logger.error(f"Order Excep: {tag} {result}")
+
+        return len(batch) + stop_resized
+
+    def resize_stop(self, name, client, live, stop):
+        """
+        Amend the live stop to stop's size and price with a single editorder.
+        Only if the exchange rejects the edit is it replaced: the new stop
+        goes in first and the old one is cancelled after, so the position is
+        never left without a stop. Returns the id of the stop now working,
+        or None if the old stop had to be kept as it was.
+        """
+        self.trigger.expect_own(name, [live["order_id"]])
+        try:
+            status = client.edit_order(
+                {"orderId": live["order_id"], "size": stop["size"], "stopPrice": stop["stopPrice"]}
+            ).get("editStatus", {})
+        except Exception as e:
+            status = {"status": "error", "error": str(e)}
+        if status.get("status") == "edited":
+            self.m_edited.inc(account=name)
+            return live["order_id"]
+        self.trigger.forget_own(name, [live["order_id"]])
+
+        logger.warning(f"{name}: Stop Edit Rejected: {status}. Replacing...")
+        stop = with_cli_ord_id(dict(stop))
+        self.trigger.expect_own(name, [stop["cliOrdId"]])
+        try:
+            placed = client.send_order(stop).get("sendStatus", {})
+        except Exception as e:
+            placed = {"status": "error", "error": str(e)}
+        if placed.get("status") != "placed" or "order_id" not in placed:
+            self.trigger.forget_own(name, [stop["cliOrdId"]])
+            logger.error(f"{name}: Replacement Stop Failed: {placed}. Keeping {live['order_id']}")
+            return None
+        self.m_placed.inc(account=name)
+
+        self.trigger.expect_own(name, [live["order_id"]])
+        try:
+            cancelled = client.cancel_order({"order_id": live["order_id"]}).get("cancelStatus", {})
+        except Exception as e:
+            cancelled = {"status": "error", "error": str(e)}
+        if cancelled.get("status") == "cancelled":
+            self.m_cancelled.inc(account=name)
+        else:
+            self.trigger.forget_own(name, [live["order_id"]])
+            # the next cycle sees two stops and cancels the extra one
+            logger.error(f"{name}: Old Stop {live['order_id']} Cancel Fail: {cancelled}")
+        return placed["order_id"]
 
     def run(self):
         logger.info(f"Engine Running. Symbol: {SYMBOL}")
+        self.start_feeds()
+        events = {}
         while True:
-            eq_long = self.get_equity(self.clients["LONG"])
-            eq_short = self.get_equity(self.clients["SHORT"])
-            min_equity = min(eq_long, eq_short)
-            
-            logger.info(f"Status | MIN EQ: {min_equity:.2f}")
-
-            for name, config in KEYS.items():
-                client = self.clients[name]
-                try:
-                    open_orders = client.get_open_orders()
-                    pos = self.get_position(client)
-                    
-                    if self.check_integrity(name, open_orders, pos, min_equity, config):
-                        logger.info(f"{name}: OK. Pos: {pos:.4f}")
-                    else:
-                        logger.info(f"{name}: State Invalid. Rebuilding...")
-                        self.force_flush(name, client)
-                        self.place_grid(name, client, config, min_equity)
-
-                except Exception as e:
-                    logger.error(f"{name} Error: {e}")
-
-            time.sleep(UPDATE_INTERVAL)
+            self.run_cycle(events or {name: set() for name in KEYS})
+            events = self.trigger.wait(UPDATE_INTERVAL)
+            if events:
+                logger.info("Wake | " + " | ".join(f"{n}: {','.join(sorted(r))}" for n, r in events.items()))
+
+    def run_parallel(self, calls):
+        """
+        Run (key, fn, *args) calls on the account pool, each inside a copy of
+        the caller's context so the active deadline applies to it; return
+        their results in order, None for any call still running at the
+        deadline. A task that outlives its cycle keeps its key busy: the
+        same key is skipped (None) until it finishes, so an account is never
+        reconciled twice at once and overruns cannot starve the pool.
+        """
+        futures = []
+        for key, *call in calls:
+            with self.busy_lock:
+                if key in self.busy:
+                    logger.warning(f"{key}: previous task still running, skipped this cycle")
+                    futures.append(None)
+                    continue
+                self.busy.add(key)
+            future = self.executor.submit(contextvars.copy_context().run, *call)
+            future.add_done_callback(lambda _, key=key: self.release(key))
+            futures.append(future)
+        done, pending = wait([f for f in futures if f is not None], timeout=time_remaining())
+        if pending:
+            logger.warning(f"Cycle deadline hit with {len(pending)} task(s) still running")
+        return [f.result() if f in done else None for f in futures]
+
+    def release(self, key):
+        with self.busy_lock:
+            self.busy.discard(key)
+
+    def run_cycle(self, events):
+        """
+        Reconcile each account in events, a map of
+        account -> wake reasons; a safety-net poll passes every account.
+        Accounts are serviced concurrently, so the cycle takes as long as
+        the slowest one, bounded by CYCLE_DEADLINE.
+        """
+        cycle_start = time.perf_counter()
+        with deadline(CYCLE_DEADLINE):
+            names = list(self.clients)
+            *equities, mark = self.run_parallel(
+                [(f"equity:{name}", self.get_equity, self.clients[name]) for name in names]
+                + [("mark", self.get_mark_price)]
+            )
+            equity = dict(zip(names, equities))
+            for name, eq in equity.items():
+                if eq is not None:
+                    self.m_equity.set(eq, account=name)
+            # the grid is sized from the smallest account; if any equity is
+            # unknown, leave the limits alone and only maintain the stops
+            if any(eq is None for eq in equity.values()):
+                min_equity = None
+                logger.warning("Status | MIN EQ: unknown, stops only this cycle")
+            else:
+                min_equity = min(equity.values())
+                logger.info(f"Status | MIN EQ: {min_equity:.2f}")
+
+            self.run_parallel([
+                (f"reconcile:{name}", self.service_account, name, events[name], equity[name], min_equity, mark or 0.0)
+                for name in KEYS if name in events
+            ])
+
+        self.m_cycle.observe(time.perf_counter() - cycle_start)
+
+    def service_account(self, name, reasons, equity, min_equity, mark):
+        config = KEYS[name]
+        client = self.clients[name]
+        if mark > 0:
+            self.m_stop_distance.set(abs(mark - config["stop"]) / mark, account=name)
+        try:
+            with deadline(RECONCILE_DEADLINE):
+                open_orders = client.get_open_orders()
+                pos = self.get_position(client)
+                self.m_position.set(pos, account=name)
+
+                resize = "equity" in reasons and min_equity is not None
+                self.reconcile_grid(name, client, config, min_equity, open_orders, pos, resize=resize)
+                if resize and equity is not None:
+                    self.trigger.equity_baseline(name, equity)
+
+        except Exception as e:
+            logger.error(f"{name} Error: {e}")
 
 if __name__ == "__main__":
     bot = EqualOpportunityBot()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Locally maintained L2 order book.
+Seeded from a REST get_orderbook call or a WebSocket book_snapshot, kept
+current from sequenced book deltas, and re-synced from a fresh sequenced
+snapshot when a sequence gap shows that an update was missed.
+"""
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("OrderBook")
+
+Level = Tuple[float, float]
+
+MAX_BUFFERED_DELTAS = 10000  # deltas held while waiting for a snapshot
+
+
+class _BookSide:
+    """
+    Price levels for one side in two parallel sorted arrays of doubles.
+
+    Keys are stored ascending with the best level last, so top-of-book
+    reads are O(1) and the busy end of the book is the cheap end to edit:
+    bids are stored as-is, asks as negated prices.
+    """
+
+    __slots__ = ("_sign", "_keys", "_qty")
+
+    def __init__(self, is_bid: bool) -> None:
+        self._sign = 1.0 if is_bid else -1.0
+        self._keys = array("d")
+        self._qty = array("d")
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def load(self, levels: List[Level]) -> None:
+        ordered = sorted((self._sign * p, q) for p, q in levels if q > 0)
+        self._keys = array("d", (k for k, _ in ordered))
+        self._qty = array("d", (q for _, q in ordered))
+
+    def update(self, price: float, qty: float) -> None:
+        key = self._sign * price
+        i = bisect_left(self._keys, key)
+        exists = i < len(self._keys) and self._keys[i] == key
+        if qty <= 0:
+            if exists:
+                self._keys.pop(i)
+                self._qty.pop(i)
+        elif exists:
+            self._qty[i] = qty
+        else:
+            self._keys.insert(i, key)
+            self._qty.insert(i, qty)
+
+    def best(self) -> Optional[Level]:
+        if not self._keys:
+            return None
+        return self._sign * self._keys[-1], self._qty[-1]
+
+    def qty_at(self, price: float) -> float:
+        key = self._sign * price
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._qty[i]
+        return 0.0
+
+    def top(self, levels: int) -> List[Level]:
+        n = len(self._keys)
+        return [(self._sign * self._keys[i], self._qty[i]) for i in range(n - 1, max(n - 1 - levels, -1), -1)]
+
+
+class OrderBook:
+    """
+    L2 book for one symbol.
+
+    Feed it WebSocket "book_snapshot"/"book" messages via handle_message()
+    (or attach() it to a KrakenFuturesWebSocket), or seed it from REST with
+    seed_from_rest(). Every delta must carry the next sequence number; on a
+    gap the book marks itself out of sync, calls on_gap, and buffers deltas
+    until the next book_snapshot, replaying only those newer than the
+    snapshot's sequence. An attached book asks for that snapshot itself by
+    resubscribing, from a helper thread so the feed thread never blocks.
+    Reads are guarded by a lock so they are safe from other threads while
+    the feed thread applies updates.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        api: Any = None,
+        on_gap: Optional[Callable[["OrderBook"], None]] = None,
+    ) -> None:
+        self.symbol = symbol.upper()
+        self.api = api
+        self.on_gap = on_gap
+        self.seq: Optional[int] = None
+        self.synced = False
+        self.gaps = 0
+        self._bids = _BookSide(is_bid=True)
+        self._asks = _BookSide(is_bid=False)
+        self._lock = threading.Lock()
+        self._feed: Any = None
+        self._pending: Deque[Dict[str, Any]] = deque(maxlen=MAX_BUFFERED_DELTAS)
+        self._resyncing = False
+
+    # ------------------------------------------------------------------
+    # seeding and updates
+    # ------------------------------------------------------------------
+    def seed_from_rest(self, api: Any = None) -> None:
+        """
+        Load a full snapshot from KrakenFuturesApi.get_orderbook, for books
+        not kept by a feed. REST snapshots carry no sequence, so the next
+        delta sets the baseline; gaps are repaired from book_snapshots only.
+        """
+        api = api or self.api
+        book = api.get_orderbook({"symbol": self.symbol}).get("orderBook", {})
+        with self._lock:
+            self._bids.load([(float(p), float(q)) for p, q in book.get("bids", [])])
+            self._asks.load([(float(p), float(q)) for p, q in book.get("asks", [])])
+            self.seq = None
+            self.synced = True
+            self._pending.clear()
+
+    def apply_snapshot(self, msg: Dict[str, Any]) -> None:
+        with self._lock:
+            self._bids.load([(float(lvl["price"]), float(lvl["qty"])) for lvl in msg.get("bids", [])])
+            self._asks.load([(float(lvl["price"]), float(lvl["qty"])) for lvl in msg.get("asks", [])])
+            self.seq = msg.get("seq")
+            self.synced = True
+            self._resyncing = False
+            buffered = [d for d in self._pending if d.get("seq") is None or self.seq is None or d["seq"] > self.seq]
+            self._pending.clear()
+        # deltas that arrived while the snapshot was on its way, in order;
+        # a hole between the snapshot and them is just another gap
+        for delta in sorted(buffered, key=lambda d: d.get("seq") or 0):
+            if not self.apply_delta(delta):
+                break
+
+    def apply_delta(self, msg: Dict[str, Any]) -> bool:
+        """Apply one level update; return False (and buffer it until the next snapshot) if out of sync."""
+        seq = msg.get("seq")
+        with self._lock:
+            if not self.synced:
+                self._pending.append(msg)
+                return False
+            if seq is not None and self.seq is not None:
+                if seq <= self.seq:
+                    return True  # duplicate or stale
+                if seq != self.seq + 1:
+                    self.synced = False
+                    self._pending.append(msg)
+            if self.synced:
+                side = self._bids if msg["side"] == "buy" else self._asks
+                side.update(float(msg["price"]), float(msg["qty"]))
+                self.seq = seq if seq is not None else self.seq
+                return True
+            resync = not self._resyncing and self._feed is not None
+            self._resyncing = self._resyncing or resync
+        self._handle_gap(seq, resync)
+        return False
+
+    def handle_message(self, msg: Dict[str, Any]) -> None:
+        if str(msg.get("product_id", "")).upper() != self.symbol:
+            return
+        if msg.get("feed") == "book_snapshot":
+            self.apply_snapshot(msg)
+        elif msg.get("feed") == "book":
+            self.apply_delta(msg)
+
+    def attach(self, feed: Any) -> None:
+        """Subscribe to a KrakenFuturesWebSocket book feed for this symbol."""
+        self._feed = feed
+        feed.subscribe("book", self.handle_message, [self.symbol])
+
+    def _handle_gap(self, seq: Optional[int], resync: bool) -> None:
+        self.gaps += 1
+        logger.warning(f"{self.symbol}: book sequence gap (have {self.seq}, got {seq}); waiting for a snapshot")
+        if self.on_gap is not None:
+            self.on_gap(self)
+        if resync:
+            threading.Thread(target=self._resubscribe, name=f"book-resync-{self.symbol}", daemon=True).start()
+
+    def _resubscribe(self) -> None:
+        try:
+            self._feed.resubscribe("book", [self.symbol])
+        except Exception as e:
+            logger.error(f"{self.symbol}: book resubscribe failed: {e}")
+            with self._lock:
+                self._resyncing = False
+
+    # ------------------------------------------------------------------
+    # queries
+    # ------------------------------------------------------------------
+    def best_bid(self) -> Optional[Level]:
+        with self._lock:
+            return self._bids.best()
+
+    def best_ask(self) -> Optional[Level]:
+        with self._lock:
+            return self._asks.best()
+
+    def mid(self) -> Optional[float]:
+        with self._lock:
+            bid, ask = self._bids.best(), self._asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2.0
+
+    def spread(self) -> Optional[float]:
+        with self._lock:
+            bid, ask = self._bids.best(), self._asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def depth_at(self, price: float, side: str) -> float:
+        """Resting quantity at an exact price; side is 'buy' or 'sell'."""
+        with self._lock:
+            return (self._bids if side == "buy" else self._asks).qty_at(price)
+
+    def depth(self, levels: int = 10) -> Dict[str, List[Level]]:
+        """Best-first top levels of each side."""
+        with self._lock:
+            return {"bids": self._bids.top(levels), "asks": self._asks.top(levels)}
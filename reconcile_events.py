@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Push-driven reconcile triggers.
+Turns private WebSocket feeds (fills, open_orders, open_positions,
+balances) into per-account wake-ups, so a reconcile loop reacts to a fill
+or a cancelled order within moments instead of at its next poll.
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+DEFAULT_DEBOUNCE = 0.25         # seconds to let a burst of related messages land
+DEFAULT_EQUITY_THRESHOLD = 0.02  # relative equity move that warrants a resize
+OWN_ORDER_TTL = 60.0            # seconds to wait for the feed to echo one of our own order changes
+
+
+class ReconcileTrigger:
+    """
+    Collects wake-up reasons per account.
+
+    Feed handlers call notify(); the reconcile loop calls wait(), which
+    blocks until something is pending or the safety-net timeout passes and
+    returns {account: {reasons}} (empty on timeout). A short debounce lets
+    the fill, order and position messages of one execution arrive together,
+    so they cost one reconcile rather than three.
+
+    Order messages the bot causes itself are ignored: before it sends,
+    edits or cancels, the bot registers the order ids / cliOrdIds with
+    expect_own() (and withdraws any whose request failed with forget_own()),
+    and the matching "_by_user" echo is swallowed once. Any
+    other order change, including a cancel or edit made by hand or by
+    another process, wakes the loop. Positions and equity only wake it when
+    they actually change: the position size moves, or margin equity drifts
+    more than equity_threshold from the value the grid was sized from.
+    """
+
+    def __init__(
+        self, debounce: float = DEFAULT_DEBOUNCE, equity_threshold: float = DEFAULT_EQUITY_THRESHOLD
+    ) -> None:
+        self.debounce = debounce
+        self.equity_threshold = equity_threshold
+        self._pending: Dict[str, Set[str]] = {}
+        self._cond = threading.Condition()
+        self._positions: Dict[Tuple[str, str], float] = {}
+        self._equity: Dict[str, float] = {}
+        self._own: Dict[str, Dict[str, float]] = {}
+
+    def notify(self, account: str, reason: str) -> None:
+        with self._cond:
+            self._pending.setdefault(account, set()).add(reason)
+            self._cond.notify_all()
+
+    def wait(self, timeout: float) -> Dict[str, Set[str]]:
+        end = time.monotonic() + timeout
+        with self._cond:
+            while not self._pending:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return {}
+                self._cond.wait(remaining)
+        time.sleep(self.debounce)
+        with self._cond:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def equity_baseline(self, account: str, equity: float) -> None:
+        """Record the equity the account's grid was sized from."""
+        with self._cond:
+            self._equity[account] = equity
+
+    def expect_own(self, account: str, refs: Iterable[Optional[str]]) -> None:
+        """Order ids / cliOrdIds the bot is about to send, edit or cancel."""
+        expires = time.monotonic() + OWN_ORDER_TTL
+        with self._cond:
+            own = self._own.setdefault(account, {})
+            for ref in refs:
+                if ref:
+                    own[ref] = expires
+
+    def forget_own(self, account: str, refs: Iterable[Optional[str]]) -> None:
+        """Withdraw refs whose request failed, so their next echo wakes the loop."""
+        with self._cond:
+            own = self._own.get(account, {})
+            for ref in refs:
+                own.pop(ref, None)
+
+    def _is_own(self, account: str, refs: Iterable[Optional[str]]) -> bool:
+        now = time.monotonic()
+        with self._cond:
+            own = self._own.get(account)
+            if not own:
+                return False
+            for ref in [r for r, expires in own.items() if expires < now]:
+                del own[ref]
+            matched = [ref for ref in refs if ref and ref in own]
+            for ref in matched:
+                del own[ref]
+        return bool(matched)
+
+    # ------------------------------------------------------------------
+    # feeds
+    # ------------------------------------------------------------------
+    def attach(self, account: str, feed: Any, symbol: str) -> None:
+        """Subscribe a KrakenFuturesWebSocket's private feeds for one account and symbol."""
+        symbol = symbol.upper()
+        feed.subscribe("fills", lambda msg: self._on_fills(account, symbol, msg))
+        feed.subscribe("open_orders", lambda msg: self._on_open_orders(account, symbol, msg))
+        feed.subscribe("open_positions", lambda msg: self._on_positions(account, symbol, msg))
+        feed.subscribe("balances", lambda msg: self._on_balances(account, msg))
+        # anything may have happened while the socket was down
+        feed.on_connect(lambda: self.notify(account, "reconnect"))
+
+    def _on_fills(self, account: str, symbol: str, msg: Dict[str, Any]) -> None:
+        if msg.get("feed", "").endswith("_snapshot"):
+            return
+        if any(str(f.get("instrument", "")).upper() == symbol for f in msg.get("fills", [])):
+            self.notify(account, "fill")
+
+    def _on_open_orders(self, account: str, symbol: str, msg: Dict[str, Any]) -> None:
+        if msg.get("feed", "").endswith("_snapshot"):
+            return
+        reason = msg.get("reason", "")
+        order = msg.get("order") or {}
+        instrument = order.get("instrument")
+        if instrument and instrument.upper() != symbol:
+            return
+        refs = (msg.get("order_id"), msg.get("cli_ord_id"), order.get("order_id"), order.get("cli_ord_id"))
+        if reason.endswith("_by_user") and self._is_own(account, refs):
+            return
+        self.notify(account, f"order:{reason or 'update'}")
+
+    def _on_positions(self, account: str, symbol: str, msg: Dict[str, Any]) -> None:
+        size = 0.0
+        for p in msg.get("positions", []):
+            if str(p.get("instrument", "")).upper() == symbol:
+                size = float(p.get("balance", 0.0))
+        key = (account, symbol)
+        with self._cond:
+            previous = self._positions.get(key)
+            self._positions[key] = size
+        if previous is not None and abs(size - previous) > 1e-12:
+            self.notify(account, "position")
+
+    def _on_balances(self, account: str, msg: Dict[str, Any]) -> None:
+        equity = (msg.get("flex_futures") or {}).get("margin_equity")
+        if equity is None:
+            return
+        equity = float(equity)
+        with self._cond:
+            baseline = self._equity.get(account)
+            if baseline is None or baseline <= 0:
+                self._equity[account] = equity
+                return
+            moved = abs(equity - baseline) / baseline > self.equity_threshold
+            if moved:
+                self._equity[account] = equity
+        if moved:
+            self.notify(account, "equity")
@@ -0,0 +1,1022 @@
+#!/usr/bin/env python3
+"""
+Local Kraken Futures stand-in.
+Serves the v3 REST endpoints KrakenFuturesApi uses, checks Authent
+signatures against registered keys and fills orders through a
+price-time-priority matching engine whose mark price follows a scriptable
+path, so the bot and the stress tester can be load-tested offline.
+"""
+import argparse
+import base64
+import bisect
+import hashlib
+import hmac
+import logging
+import math
+import os
+import random
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from instruments import InstrumentSpec
+from kraken_futures import default_codec
+
+logger = logging.getLogger("SimServer")
+
+DEFAULT_PORT = 8787
+DEFAULT_INSTRUMENTS: Dict[str, float] = {"PF_XBTUSD": 65000.0, "FF_XBTUSD_260227": 65000.0}
+DEFAULT_COLLATERAL = 100_000.0
+DEFAULT_LEVERAGE = 50.0
+MAKER_FEE = 0.0002
+TAKER_FEE = 0.0005
+FILLS_PAGE = 100
+NONCE_WINDOW = 10_000
+EPS = 1e-12
+
+ORDER_TYPES = ("lmt", "post", "ioc", "mkt", "stp", "take_profit")
+STOP_TYPES = ("stp", "take_profit")
+
+
+def _iso(ts: float) -> str:
+    ms = int(round(ts * 1000))
+    return datetime.fromtimestamp(ms // 1000, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + f"{ms % 1000:03d}Z"
+
+
+def _flag(value: Any) -> bool:
+    return str(value).lower() == "true"
+
+
+def instrument_row(symbol: str, tick_size: float = 0.5, precision: int = 4) -> Dict[str, Any]:
+    """A get_instruments entry for a linear (flex) contract; FF_*_YYMMDD symbols get an expiry."""
+    symbol = symbol.upper()
+    row: Dict[str, Any] = {
+        "symbol": symbol,
+        "type": "flexible_futures",
+        "tradeable": True,
+        "tickSize": tick_size,
+        "contractSize": 1,
+        "contractValueTradePrecision": precision,
+        "impactMidSize": 1,
+        "maxPositionSize": 1_000_000,
+        "marginLevels": [{"contracts": 0, "initialMargin": 0.02, "maintenanceMargin": 0.01}],
+        "tag": "perpetual",
+    }
+    expiry = symbol.rsplit("_", 1)[-1]
+    if symbol.startswith("FF_") and len(expiry) == 6 and expiry.isdigit():
+        row["lastTradingTime"] = f"20{expiry[:2]}-{expiry[2:4]}-{expiry[4:]}T16:00:00.000Z"
+        row["tag"] = "month"
+    return row
+
+
+# ------------------------------------------------------------------
+# price paths
+# ------------------------------------------------------------------
+class PricePath:
+    """
+    Mark price over time: piecewise-linear through (seconds, price)
+    waypoints, holding the last price afterwards or wrapping round when
+    loop is set.
+    """
+
+    def __init__(self, waypoints: Sequence[Tuple[float, float]], loop: bool = False) -> None:
+        if not waypoints:
+            raise ValueError("price path needs at least one waypoint")
+        points = sorted(waypoints)
+        self.times = [float(t) for t, _ in points]
+        self.prices = [float(p) for _, p in points]
+        self.loop = loop
+
+    @classmethod
+    def constant(cls, price: float) -> "PricePath":
+        return cls([(0.0, price)])
+
+    @classmethod
+    def random_walk(
+        cls,
+        start: float,
+        volatility: float = 0.0005,
+        step: float = 1.0,
+        duration: float = 3600.0,
+        seed: Optional[int] = None,
+        loop: bool = True,
+    ) -> "PricePath":
+        """Geometric random walk, volatility per step; a fixed seed replays the same path."""
+        rng = random.Random(seed)
+        price = start
+        points = [(0.0, start)]
+        for k in range(1, int(duration / step) + 1):
+            price *= math.exp(rng.gauss(0.0, volatility))
+            points.append((k * step, price))
+        return cls(points, loop)
+
+    @classmethod
+    def from_csv(cls, path: str, loop: bool = False) -> "PricePath":
+        """Lines of 'seconds,price'; a non-numeric header line is skipped."""
+        points = []
+        with open(path) as f:
+            for line in f:
+                fields = line.strip().split(",")
+                try:
+                    points.append((float(fields[0]), float(fields[1])))
+                except (IndexError, ValueError):
+                    continue
+        return cls(points, loop)
+
+    def at(self, t: float) -> float:
+        if self.loop and self.times[-1] > 0:
+            t %= self.times[-1]
+        i = bisect.bisect_right(self.times, t)
+        if i == 0:
+            return self.prices[0]
+        if i == len(self.times):
+            return self.prices[-1]
+        t0, t1 = self.times[i - 1], self.times[i]
+        p0, p1 = self.prices[i - 1], self.prices[i]
+        return p0 + (p1 - p0) * (t - t0) / (t1 - t0)
+
+
+# ------------------------------------------------------------------
+# matching engine
+# ------------------------------------------------------------------
+class SimOrder:
+    __slots__ = (
+        "order_id",
+        "account",
+        "symbol",
+        "side",
+        "order_type",
+        "size",
+        "filled",
+        "limit_price",
+        "stop_price",
+        "reduce_only",
+        "cli_ord_id",
+        "received",
+        "updated",
+        "reserved",
+    )
+
+    def __init__(
+        self,
+        account: "SimAccount",
+        symbol: str,
+        side: str,
+        order_type: str,
+        size: float,
+        limit_price: Optional[float],
+        stop_price: Optional[float],
+        reduce_only: bool,
+        cli_ord_id: Optional[str],
+    ) -> None:
+        self.order_id = str(uuid.uuid4())
+        self.account = account
+        self.symbol = symbol
+        self.side = side
+        self.order_type = order_type
+        self.size = size
+        self.filled = 0.0
+        self.limit_price = limit_price
+        self.stop_price = stop_price
+        self.reduce_only = reduce_only
+        self.cli_ord_id = cli_ord_id
+        self.received = self.updated = time.time()
+        self.reserved = 0.0
+
+    @property
+    def remaining(self) -> float:
+        return round(self.size - self.filled, 10)
+
+    def open_order(self) -> Dict[str, Any]:
+        """openorders entry, shaped like Kraken's."""
+        row: Dict[str, Any] = {
+            "order_id": self.order_id,
+            "symbol": self.symbol,
+            "side": self.side,
+            "orderType": "lmt" if self.order_type in ("lmt", "post") else self.order_type,
+            "unfilledSize": self.remaining,
+            "filledSize": self.filled,
+            "receivedTime": _iso(self.received),
+            "lastUpdateTime": _iso(self.updated),
+            "status": "partiallyFilled" if self.filled > 0 else "untouched",
+            "reduceOnly": self.reduce_only,
+        }
+        if self.order_type in STOP_TYPES:
+            row["orderType"] = "stop" if self.order_type == "stp" else "take_profit"
+            row["stopPrice"] = self.stop_price
+            row["triggerSignal"] = "mark_price"
+        if self.limit_price is not None:
+            row["limitPrice"] = self.limit_price
+        if self.cli_ord_id:
+            row["cliOrdId"] = self.cli_ord_id
+        return row
+
+
+class SimAccount:
+    """One API key: credentials, collateral, positions, resting orders and fills."""
+
+    def __init__(self, api_key: str, api_secret: str, collateral: float = DEFAULT_COLLATERAL) -> None:
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self._hmac_template = hmac.new(base64.b64decode(api_secret), digestmod=hashlib.sha512)
+        self.collateral = collateral
+        # symbol -> [signed size, average entry price, last fill time]
+        self.positions: Dict[str, List[Any]] = {}
+        self.orders: Dict[str, SimOrder] = {}
+        self.by_cli_ord_id: Dict[str, SimOrder] = {}
+        self.fills: List[Dict[str, Any]] = []
+        self.cancel_after: Optional[float] = None
+        # notional of resting non-reduce-only orders, kept current by the engine
+        self.reserved = 0.0
+        self._last_fill_ms = 0
+        self._nonces: Deque[str] = deque()
+        self._nonce_set: set = set()
+
+    def verify(self, path: str, nonce: str, authent: str, post_data: Sequence[str]) -> bool:
+        """Authent matches one of the candidate postData strings."""
+        for data in post_data:
+            mac = self._hmac_template.copy()
+            mac.update(hashlib.sha256((data + nonce + path).encode()).digest())
+            if hmac.compare_digest(base64.b64encode(mac.digest()).decode(), authent):
+                return True
+        return False
+
+    def use_nonce(self, nonce: str) -> bool:
+        """False when nonce was already seen among the last NONCE_WINDOW requests."""
+        if nonce in self._nonce_set:
+            return False
+        self._nonces.append(nonce)
+        self._nonce_set.add(nonce)
+        if len(self._nonces) > NONCE_WINDOW:
+            self._nonce_set.discard(self._nonces.popleft())
+        return True
+
+    def fill_time(self) -> str:
+        # strictly increasing per account, so lastFillTime paging never skips or repeats
+        ms = max(int(time.time() * 1000), self._last_fill_ms + 1)
+        self._last_fill_ms = ms
+        return _iso(ms / 1000.0)
+
+
+class _BookSide:
+    """Resting limit orders of one side: sorted prices plus a FIFO queue per price."""
+
+    def __init__(self, is_bid: bool) -> None:
+        self.is_bid = is_bid
+        self.prices: List[float] = []
+        self.levels: Dict[float, Deque[SimOrder]] = {}
+
+    def add(self, order: SimOrder) -> None:
+        price = order.limit_price
+        level = self.levels.get(price)
+        if level is None:
+            bisect.insort(self.prices, price)
+            level = self.levels[price] = deque()
+        level.append(order)
+
+    def remove(self, order: SimOrder) -> None:
+        price = order.limit_price
+        level = self.levels[price]
+        level.remove(order)
+        if not level:
+            del self.levels[price]
+            del self.prices[bisect.bisect_left(self.prices, price)]
+
+    def best(self) -> Optional[float]:
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.is_bid else self.prices[0]
+
+    def head(self) -> Optional[SimOrder]:
+        best = self.best()
+        return None if best is None else self.levels[best][0]
+
+    def depth(self, levels: int = 25) -> List[List[float]]:
+        prices = reversed(self.prices) if self.is_bid else iter(self.prices)
+        out = []
+        for price in prices:
+            out.append([price, round(sum(o.remaining for o in self.levels[price]), 10)])
+            if len(out) == levels:
+                break
+        return out
+
+
+class MatchingEngine:
+    """
+    Price-time-priority books for every instrument.
+
+    Incoming orders first match resting orders from any account; whatever
+    still crosses the mark price then trades against outside liquidity at
+    the mark. Moving the mark fills resting limits it touches, at their
+    own price, and then triggers stops and take-profits. Positions are linear,
+    margined in USD at a flat leverage, with maker/taker fees.
+    """
+
+    def __init__(
+        self,
+        instruments: Optional[Dict[str, float]] = None,
+        tick_size: float = 0.5,
+        precision: int = 4,
+        leverage: float = DEFAULT_LEVERAGE,
+    ) -> None:
+        instruments = instruments or DEFAULT_INSTRUMENTS
+        self.rows = [instrument_row(symbol, tick_size, precision) for symbol in instruments]
+        self.specs = {row["symbol"]: InstrumentSpec(row) for row in self.rows}
+        self.marks = {symbol.upper(): float(price) for symbol, price in instruments.items()}
+        self.last = dict(self.marks)
+        self.volume: Dict[str, float] = {symbol: 0.0 for symbol in self.marks}
+        self.bids = {symbol: _BookSide(True) for symbol in self.marks}
+        self.asks = {symbol: _BookSide(False) for symbol in self.marks}
+        self.stops: Dict[str, List[SimOrder]] = {symbol: [] for symbol in self.marks}
+        self.leverage = leverage
+        self.accounts: Dict[str, SimAccount] = {}
+        self._lock = threading.RLock()
+
+    def add_account(self, api_key: str, api_secret: str, collateral: float = DEFAULT_COLLATERAL) -> SimAccount:
+        with self._lock:
+            account = self.accounts[api_key] = SimAccount(api_key, api_secret, collateral)
+            return account
+
+    # -------------------------------------------------------------- orders
+    def send_order(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            order, status = self._new_order(account, params)
+            if order is None:
+                return {"status": status, "receivedTime": _iso(now), "orderEvents": []}
+            events: List[Dict[str, Any]] = [{"type": "PLACE", "order": order.open_order()}]
+            status = self._submit(order, events)
+            result = {"status": status, "receivedTime": _iso(now), "orderEvents": events}
+            if status == "placed":
+                result["order_id"] = order.order_id
+            if order.cli_ord_id:
+                result["cliOrdId"] = order.cli_ord_id
+            return result
+
+    def _new_order(self, account: SimAccount, params: Dict[str, Any]) -> Tuple[Optional[SimOrder], str]:
+        symbol = str(params.get("symbol", "")).upper()
+        spec = self.specs.get(symbol)
+        if spec is None:
+            return None, "marketInactive"
+        order_type = params.get("orderType")
+        if order_type not in ORDER_TYPES:
+            return None, "invalidOrderType"
+        side = params.get("side")
+        if side not in ("buy", "sell"):
+            return None, "invalidSide"
+        try:
+            size = float(params.get("size", 0))
+            limit_price = None if params.get("limitPrice") is None else float(params["limitPrice"])
+            stop_price = None if params.get("stopPrice") is None else float(params["stopPrice"])
+        except (TypeError, ValueError):
+            return None, "invalidArgument"
+        if size <= 0 or abs(spec.qty_grid.round(size) - size) > EPS:
+            return None, "invalidSize"
+        if order_type in ("lmt", "post", "ioc") and limit_price is None:
+            return None, "invalidPrice"
+        if order_type in STOP_TYPES and stop_price is None:
+            return None, "invalidPrice"
+        for price in (limit_price, stop_price):
+            if price is not None and (price <= 0 or abs(spec.round_price(price) - price) > EPS):
+                return None, "invalidPrice"
+        cli_ord_id = params.get("cliOrdId")
+        if cli_ord_id and cli_ord_id in account.by_cli_ord_id:
+            return None, "clientOrderIdAlreadyExist"
+        reduce_only = _flag(params.get("reduceOnly", False))
+        if order_type == "mkt":
+            limit_price = None
+        order = SimOrder(account, symbol, side, order_type, size, limit_price, stop_price, reduce_only, cli_ord_id)
+        if not reduce_only:
+            price = limit_price or stop_price or self.marks[symbol]
+            if size * price / self.leverage > self._margin(account)["availableMargin"]:
+                return None, "insufficientAvailableFunds"
+        return order, "placed"
+
+    def _submit(self, order: SimOrder, events: List[Dict[str, Any]]) -> str:
+        if order.order_type in STOP_TYPES:
+            self._rest(order)
+            self._check_trigger(order)
+            return "placed"
+        if order.reduce_only and not self._clamp_reduce_only(order):
+            return "wouldNotReducePosition"
+        if order.order_type == "post" and self._would_take(order):
+            return "postWouldExecute"
+        self._match(order, events)
+        if order.remaining <= EPS:
+            return "placed"
+        if order.order_type == "ioc":
+            if order.filled <= 0:
+                return "iocWouldNotExecute"
+            events.append({"type": "CANCEL", "uid": order.order_id, "reason": "IOC_ORDER_FAILED_BECAUSE_IT_WOULD_NOT_BE_EXECUTED"})
+            return "placed"
+        if order.order_type == "mkt":
+            events.append({"type": "CANCEL", "uid": order.order_id, "reason": "NOT_ENOUGH_LIQUIDITY"})
+            return "placed"
+        self._rest(order)
+        return "placed"
+
+    def _rest(self, order: SimOrder) -> None:
+        account = order.account
+        account.orders[order.order_id] = order
+        if order.cli_ord_id:
+            account.by_cli_ord_id[order.cli_ord_id] = order
+        if order.order_type in STOP_TYPES:
+            self.stops[order.symbol].append(order)
+        else:
+            (self.bids if order.side == "buy" else self.asks)[order.symbol].add(order)
+        self._reserve(order)
+
+    def _retire(self, order: SimOrder) -> None:
+        account = order.account
+        account.orders.pop(order.order_id, None)
+        self._reserve(order)
+        if order.cli_ord_id and account.by_cli_ord_id.get(order.cli_ord_id) is order:
+            del account.by_cli_ord_id[order.cli_ord_id]
+
+    @staticmethod
+    def _reserve(order: SimOrder) -> None:
+        """Re-count order's notional in its account's reserved total."""
+        notional = 0.0
+        if not order.reduce_only and order.order_id in order.account.orders:
+            notional = order.remaining * (order.limit_price or order.stop_price)
+        order.account.reserved += notional - order.reserved
+        order.reserved = notional
+
+    def _unrest(self, order: SimOrder) -> None:
+        if order.order_type in STOP_TYPES:
+            self.stops[order.symbol].remove(order)
+        else:
+            (self.bids if order.side == "buy" else self.asks)[order.symbol].remove(order)
+        self._retire(order)
+
+    @staticmethod
+    def _crosses(order: SimOrder, price: float) -> bool:
+        if order.limit_price is None:
+            return True
+        return price <= order.limit_price if order.side == "buy" else price >= order.limit_price
+
+    def _would_take(self, order: SimOrder) -> bool:
+        opposite = (self.asks if order.side == "buy" else self.bids)[order.symbol].best()
+        if opposite is not None and self._crosses(order, opposite):
+            return True
+        return self._crosses(order, self.marks[order.symbol])
+
+    def _match(self, order: SimOrder, events: List[Dict[str, Any]]) -> None:
+        book = (self.asks if order.side == "buy" else self.bids)[order.symbol]
+        while order.remaining > EPS:
+            maker = book.head()
+            if maker is None or not self._crosses(order, maker.limit_price):
+                break
+            qty = min(order.remaining, maker.remaining)
+            self._trade(maker, qty, maker.limit_price, "maker")
+            events.append(self._trade(order, qty, maker.limit_price, "taker"))
+            if maker.remaining <= EPS:
+                book.remove(maker)
+                self._retire(maker)
+        # outside liquidity at the mark takes whatever still crosses it
+        mark = self.marks[order.symbol]
+        if order.remaining > EPS and self._crosses(order, mark):
+            events.append(self._trade(order, order.remaining, mark, "taker"))
+
+    def _clamp_reduce_only(self, order: SimOrder) -> bool:
+        """Shrink a reduce-only order to the opposing position; False if nothing is left."""
+        size = order.account.positions.get(order.symbol, [0.0])[0]
+        allowed = max(0.0, -size) if order.side == "buy" else max(0.0, size)
+        if allowed <= EPS:
+            return False
+        order.size = round(order.filled + min(order.remaining, allowed), 10)
+        return True
+
+    def _trade(self, order: SimOrder, qty: float, price: float, liquidity: str) -> Dict[str, Any]:
+        account = order.account
+        order.filled = round(order.filled + qty, 10)
+        order.updated = time.time()
+        self._reserve(order)
+        fill_time = account.fill_time()
+        signed = qty if order.side == "buy" else -qty
+        position = account.positions.setdefault(order.symbol, [0.0, 0.0, fill_time])
+        size, entry = position[0], position[1]
+        if size == 0 or (size > 0) == (signed > 0):
+            new_size = size + signed
+            position[1] = (size * entry + signed * price) / new_size
+        else:
+            closed = min(abs(signed), abs(size))
+            account.collateral += closed * (price - entry) * (1 if size > 0 else -1)
+            new_size = size + signed
+            if abs(new_size) <= EPS:
+                new_size, position[1] = 0.0, 0.0
+            elif (new_size > 0) != (size > 0):
+                position[1] = price
+        position[0] = round(new_size, 10)
+        position[2] = fill_time
+        account.collateral -= qty * price * (MAKER_FEE if liquidity == "maker" else TAKER_FEE)
+        self.last[order.symbol] = price
+        self.volume[order.symbol] += qty
+        fill = {
+            "fill_id": str(uuid.uuid4()),
+            "symbol": order.symbol,
+            "side": order.side,
+            "order_id": order.order_id,
+            "size": qty,
+            "price": price,
+            "fillTime": fill_time,
+            "fillType": liquidity,
+        }
+        if order.cli_ord_id:
+            fill["cliOrdId"] = order.cli_ord_id
+        account.fills.append(fill)
+        return {"type": "EXECUTION", "executionId": fill["fill_id"], "price": price, "amount": qty}
+
+    def edit_order(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            order_id = params.get("orderId") or params.get("order_id")
+            order = account.orders.get(order_id) if order_id else account.by_cli_ord_id.get(params.get("cliOrdId"))
+            result: Dict[str, Any] = {"receivedTime": _iso(now), "orderEvents": []}
+            if order is None:
+                return {**result, "status": "orderForEditNotFound"}
+            result["order_id"] = order.order_id
+            if order.cli_ord_id:
+                result["cliOrdId"] = order.cli_ord_id
+            spec = self.specs[order.symbol]
+            try:
+                size = None if params.get("size") is None else float(params["size"])
+                limit_price = None if params.get("limitPrice") is None else float(params["limitPrice"])
+                stop_price = None if params.get("stopPrice") is None else float(params["stopPrice"])
+            except (TypeError, ValueError):
+                return {**result, "status": "invalidArgument"}
+            if size is not None and (size <= order.filled or abs(spec.qty_grid.round(size) - size) > EPS):
+                return {**result, "status": "invalidSize"}
+            for price in (limit_price, stop_price):
+                if price is not None and (price <= 0 or abs(spec.round_price(price) - price) > EPS):
+                    return {**result, "status": "invalidPrice"}
+            if stop_price is not None and order.order_type not in STOP_TYPES:
+                return {**result, "status": "orderForEditNotAStop"}
+
+            old = order.open_order()
+            keeps_priority = (
+                (limit_price is None or limit_price == order.limit_price)
+                and (size is None or size <= order.size)
+            )
+            if order.order_type in STOP_TYPES or not keeps_priority:
+                self._unrest(order)
+            if size is not None:
+                order.size = size
+            if limit_price is not None:
+                order.limit_price = limit_price
+            if stop_price is not None:
+                order.stop_price = stop_price
+            order.updated = now
+            result["orderEvents"].append({"type": "EDIT", "old": old, "new": order.open_order()})
+            if order.order_type in STOP_TYPES:
+                self._rest(order)
+                self._check_trigger(order)
+            elif not keeps_priority:
+                self._match(order, result["orderEvents"])
+                if order.remaining > EPS:
+                    self._rest(order)
+            else:
+                self._reserve(order)
+            return {**result, "status": "edited"}
+
+    def cancel_order(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            order_id = params.get("order_id")
+            order = account.orders.get(order_id) if order_id else account.by_cli_ord_id.get(params.get("cliOrdId"))
+            result: Dict[str, Any] = {"receivedTime": _iso(time.time()), "orderEvents": []}
+            if order is None:
+                if order_id:
+                    result["order_id"] = order_id
+                elif params.get("cliOrdId"):
+                    result["cliOrdId"] = params["cliOrdId"]
+                return {**result, "status": "notFound"}
+            self._unrest(order)
+            result["order_id"] = order.order_id
+            if order.cli_ord_id:
+                result["cliOrdId"] = order.cli_ord_id
+            result["orderEvents"].append({"type": "CANCEL", "uid": order.order_id, "order": order.open_order()})
+            return {**result, "status": "cancelled"}
+
+    def cancel_all(self, account: SimAccount, symbol: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            symbol = symbol.upper() if symbol else None
+            cancelled = []
+            for order in list(account.orders.values()):
+                if symbol is None or order.symbol == symbol:
+                    self._unrest(order)
+                    entry = {"order_id": order.order_id}
+                    if order.cli_ord_id:
+                        entry["cliOrdId"] = order.cli_ord_id
+                    cancelled.append(entry)
+            return {
+                "receivedTime": _iso(time.time()),
+                "cancelOnly": symbol or "all",
+                "status": "cancelled" if cancelled else "noOrdersToCancel",
+                "cancelledOrders": cancelled,
+                "orderEvents": [],
+            }
+
+    def cancel_all_after(self, account: SimAccount, timeout: float) -> Dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            account.cancel_after = now + timeout if timeout > 0 else None
+            return {"currentTime": _iso(now), "triggerTime": _iso(now + timeout) if timeout > 0 else "0"}
+
+    def expire_cancel_after(self, now: float) -> None:
+        """Dead man's switch: cancel everything for accounts whose timer ran out."""
+        with self._lock:
+            for account in self.accounts.values():
+                if account.cancel_after is not None and now >= account.cancel_after:
+                    account.cancel_after = None
+                    self.cancel_all(account)
+
+    def batch(self, account: SimAccount, instructions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            statuses = []
+            for instruction in instructions:
+                kind = instruction.get("order")
+                if kind == "send":
+                    status = self.send_order(account, instruction)
+                    entry = {
+                        "status": status["status"],
+                        "order_tag": instruction.get("order_tag"),
+                        "dateTimeReceived": status["receivedTime"],
+                        "orderEvents": status["orderEvents"],
+                    }
+                    if "order_id" in status:
+                        entry["order_id"] = status["order_id"]
+                    if instruction.get("cliOrdId"):
+                        entry["cliOrdId"] = instruction["cliOrdId"]
+                elif kind == "edit":
+                    entry = self.edit_order(account, instruction)
+                elif kind == "cancel":
+                    entry = self.cancel_order(account, instruction)
+                else:
+                    entry = {"status": "invalidArgument", "order_tag": instruction.get("order_tag")}
+                statuses.append(entry)
+            return statuses
+
+    # ---------------------------------------------------------------- mark
+    def set_mark(self, symbol: str, price: float) -> None:
+        """Move the mark: fill resting limits it touches, then fire stops it crosses."""
+        symbol = symbol.upper()
+        with self._lock:
+            self.marks[symbol] = price
+            bids, asks = self.bids[symbol], self.asks[symbol]
+            while bids.best() is not None and bids.best() >= price:
+                self._fill_resting(bids, bids.head())
+            while asks.best() is not None and asks.best() <= price:
+                self._fill_resting(asks, asks.head())
+            for order in list(self.stops[symbol]):
+                if order.order_id in order.account.orders and self._triggered(order, price):
+                    self._trigger(order)
+
+    def _fill_resting(self, side: _BookSide, order: SimOrder) -> None:
+        self._trade(order, order.remaining, order.limit_price, "maker")
+        side.remove(order)
+        self._retire(order)
+
+    @staticmethod
+    def _triggered(order: SimOrder, mark: float) -> bool:
+        rising = (order.side == "buy") == (order.order_type == "stp")
+        return mark >= order.stop_price if rising else mark <= order.stop_price
+
+    def _check_trigger(self, order: SimOrder) -> None:
+        if self._triggered(order, self.marks[order.symbol]):
+            self._trigger(order)
+
+    def _trigger(self, order: SimOrder) -> None:
+        self._unrest(order)
+        if order.reduce_only and not self._clamp_reduce_only(order):
+            return
+        order.order_type = "lmt" if order.limit_price is not None else "mkt"
+        self._match(order, [])
+        if order.order_type == "lmt" and order.remaining > EPS:
+            self._rest(order)
+
+    # --------------------------------------------------------------- views
+    def _margin(self, account: SimAccount) -> Dict[str, float]:
+        unrealized = position_margin = 0.0
+        for symbol, (size, entry, _) in account.positions.items():
+            mark = self.marks[symbol]
+            unrealized += size * (mark - entry)
+            position_margin += abs(size) * mark / self.leverage
+        order_margin = account.reserved / self.leverage
+        equity = account.collateral + unrealized
+        return {
+            "portfolioValue": equity,
+            "balanceValue": account.collateral,
+            "collateralValue": account.collateral,
+            "totalUnrealized": unrealized,
+            "unrealizedFunding": 0.0,
+            "pnl": unrealized,
+            "initialMargin": position_margin,
+            "maintenanceMargin": position_margin / 2,
+            "marginEquity": equity,
+            "availableMargin": equity - position_margin - order_margin,
+        }
+
+    def accounts_view(self, account: SimAccount) -> Dict[str, Any]:
+        with self._lock:
+            margin = self._margin(account)
+            usd = {
+                "quantity": account.collateral,
+                "value": account.collateral,
+                "collateral": account.collateral,
+                "available": margin["availableMargin"],
+            }
+            return {"flex": {"type": "multiCollateralMarginAccount", "currencies": {"USD": usd}, **margin}}
+
+    def open_orders(self, account: SimAccount) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [order.open_order() for order in sorted(account.orders.values(), key=lambda o: o.received)]
+
+    def open_positions(self, account: SimAccount) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "side": "long" if size > 0 else "short",
+                    "symbol": symbol,
+                    "price": entry,
+                    "fillTime": fill_time,
+                    "size": abs(size),
+                    "unrealizedFunding": 0.0,
+                }
+                for symbol, (size, entry, fill_time) in account.positions.items()
+                if size != 0
+            ]
+
+    def fills_view(self, account: SimAccount, last_fill_time: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Newest first, FILLS_PAGE at a time, strictly older than last_fill_time."""
+        with self._lock:
+            fills = account.fills
+            end = len(fills)
+            if last_fill_time:
+                end = bisect.bisect_left([f["fillTime"] for f in fills], last_fill_time)
+            return fills[max(0, end - FILLS_PAGE):end][::-1]
+
+    def tickers(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = []
+            for row in self.rows:
+                symbol = row["symbol"]
+                mark, tick = self.marks[symbol], row["tickSize"]
+                bid, ask = self.bids[symbol].best(), self.asks[symbol].best()
+                rows.append({
+                    "symbol": symbol,
+                    "tag": row["tag"],
+                    "markPrice": mark,
+                    "bid": bid if bid is not None else mark - tick,
+                    "ask": ask if ask is not None else mark + tick,
+                    "last": self.last[symbol],
+                    "vol24h": self.volume[symbol],
+                    "suspended": False,
+                })
+            return rows
+
+    def order_book(self, symbol: str) -> Dict[str, Any]:
+        symbol = symbol.upper()
+        with self._lock:
+            if symbol not in self.marks:
+                return {}
+            return {"bids": self.bids[symbol].depth(), "asks": self.asks[symbol].depth()}
+
+
+# ------------------------------------------------------------------
+# HTTP front end
+# ------------------------------------------------------------------
+Route = Tuple[Callable[["SimServer", Optional[SimAccount], Dict[str, Any]], Dict[str, Any]], bool]
+
+
+class SimServer:
+    """
+    ThreadingHTTPServer in front of a MatchingEngine.
+
+    Private endpoints require a registered APIKey, an unused Nonce and an
+    Authent computed exactly as KrakenFuturesApi does (GET signatures are
+    accepted over either an empty string or the query string). A clock
+    thread moves each symbol's mark along its PricePath every tick and runs
+    cancelallordersafter timers. POST /sim/price (symbol, price) sets a mark
+    by hand and detaches that symbol from its path.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[MatchingEngine] = None,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        paths: Optional[Dict[str, PricePath]] = None,
+        tick_interval: float = 0.1,
+    ) -> None:
+        self.engine = engine or MatchingEngine()
+        self.paths = {symbol.upper(): path for symbol, path in (paths or {}).items()}
+        self.tick_interval = tick_interval
+        self.codec = default_codec()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.sim = self
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_account(self, api_key: str, api_secret: str, collateral: float = DEFAULT_COLLATERAL) -> SimAccount:
+        return self.engine.add_account(api_key, api_secret, collateral)
+
+    def start(self) -> "SimServer":
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self.httpd.serve_forever, name="sim-http", daemon=True),
+            threading.Thread(target=self._clock, name="sim-clock", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _clock(self) -> None:
+        start = time.monotonic()
+        while not self._stop.wait(self.tick_interval):
+            elapsed = time.monotonic() - start
+            for symbol, path in list(self.paths.items()):
+                spec = self.engine.specs.get(symbol)
+                if spec is not None:
+                    self.engine.set_mark(symbol, spec.round_price(path.at(elapsed)))
+            self.engine.expire_cancel_after(time.time())
+
+    # ------------------------------------------------------------- routing
+    def handle(self, method: str, path: str, query: str, body: str, headers: Any) -> Tuple[int, Dict[str, Any]]:
+        route = ROUTES.get((method, path))
+        if route is None:
+            return 404, {"result": "error", "error": "notFound"}
+        handler, private = route
+        params: Dict[str, Any] = {k: v[-1] for k, v in urllib.parse.parse_qs(body or query).items()}
+        account = None
+        if private:
+            account = self.engine.accounts.get(headers.get("APIKey", ""))
+            sign_path = path[12:] if path.startswith("/derivatives") else path
+            candidates = (body,) if method == "POST" else ("", query)
+            nonce = headers.get("Nonce", "")
+            if account is None or not account.verify(sign_path, nonce, headers.get("Authent", ""), candidates):
+                return 401, {"result": "error", "error": "authenticationError"}
+            if not account.use_nonce(nonce):
+                return 200, {"result": "error", "error": "nonceDuplicate"}
+        try:
+            payload = handler(self, account, params)
+        except (KeyError, TypeError, ValueError) as e:
+            return 400, {"result": "error", "error": f"invalidArgument: {e}"}
+        return 200, {"result": "success", **payload, "serverTime": _iso(time.time())}
+
+    def _instruments(self, account: Optional[SimAccount], params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"instruments": self.engine.rows}
+
+    def _tickers(self, account: Optional[SimAccount], params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"tickers": self.engine.tickers()}
+
+    def _orderbook(self, account: Optional[SimAccount], params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"orderBook": self.engine.order_book(params["symbol"])}
+
+    def _accounts(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"accounts": self.engine.accounts_view(account)}
+
+    def _send_order(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"sendStatus": self.engine.send_order(account, params)}
+
+    def _edit_order(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"editStatus": self.engine.edit_order(account, params)}
+
+    def _cancel_order(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"cancelStatus": self.engine.cancel_order(account, params)}
+
+    def _cancel_all(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"cancelStatus": self.engine.cancel_all(account, params.get("symbol"))}
+
+    def _cancel_all_after(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"status": self.engine.cancel_all_after(account, float(params.get("timeout", 0)))}
+
+    def _batch_order(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        batch = self.codec.loads(params["json"])
+        return {"batchStatus": self.engine.batch(account, batch.get("batchOrder", []))}
+
+    def _open_orders(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"openOrders": self.engine.open_orders(account)}
+
+    def _open_positions(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"openPositions": self.engine.open_positions(account)}
+
+    def _fills(self, account: SimAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"fills": self.engine.fills_view(account, params.get("lastFillTime"))}
+
+    def _set_price(self, account: Optional[SimAccount], params: Dict[str, Any]) -> Dict[str, Any]:
+        symbol = params["symbol"].upper()
+        self.paths.pop(symbol, None)
+        self.engine.set_mark(symbol, float(params["price"]))
+        return {"markPrice": self.engine.marks[symbol]}
+
+
+ROUTES: Dict[Tuple[str, str], Route] = {
+    ("GET", "/derivatives/api/v3/instruments"): (SimServer._instruments, False),
+    ("GET", "/derivatives/api/v3/tickers"): (SimServer._tickers, False),
+    ("GET", "/derivatives/api/v3/orderbook"): (SimServer._orderbook, False),
+    ("GET", "/derivatives/api/v3/accounts"): (SimServer._accounts, True),
+    ("GET", "/derivatives/api/v3/openorders"): (SimServer._open_orders, True),
+    ("GET", "/derivatives/api/v3/openpositions"): (SimServer._open_positions, True),
+    ("GET", "/derivatives/api/v3/fills"): (SimServer._fills, True),
+    ("POST", "/derivatives/api/v3/sendorder"): (SimServer._send_order, True),
+    ("POST", "/derivatives/api/v3/editorder"): (SimServer._edit_order, True),
+    ("POST", "/derivatives/api/v3/cancelorder"): (SimServer._cancel_order, True),
+    ("POST", "/derivatives/api/v3/cancelallorders"): (SimServer._cancel_all, True),
+    ("POST", "/derivatives/api/v3/cancelallordersafter"): (SimServer._cancel_all_after, True),
+    ("POST", "/derivatives/api/v3/batchorder"): (SimServer._batch_order, True),
+    ("POST", "/sim/price"): (SimServer._set_price, False),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # keep-alive, so pooled client sessions reuse their sockets; headers and
+    # body go out in separate writes, so Nagle would stall each response
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format, *args)
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        sim: SimServer = self.server.sim
+        parts = urllib.parse.urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode() if length else ""
+        status, payload = sim.handle(method, parts.path, parts.query, body, self.headers)
+        data = sim.codec.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def generate_credentials() -> Tuple[str, str]:
+    """A random (api_key, api_secret) pair in Kraken's format."""
+    return base64.b64encode(os.urandom(36)).decode(), base64.b64encode(os.urandom(64)).decode()
+
+
+# ------------------------------------------------------------------
+# command line
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Kraken Futures stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--accounts", type=int, default=2, help="generated accounts (ignored with --account)")
+    parser.add_argument("--account", action="append", default=[], metavar="KEY:SECRET")
+    parser.add_argument("--collateral", type=float, default=DEFAULT_COLLATERAL)
+    parser.add_argument("--symbol", action="append", default=[], metavar="SYMBOL=PRICE")
+    parser.add_argument("--path-csv", action="append", default=[], metavar="SYMBOL=FILE")
+    parser.add_argument("--volatility", type=float, default=0.0005, help="random-walk step volatility, 0 = flat")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--tick", type=float, default=0.1, help="seconds between mark updates")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    instruments = dict(DEFAULT_INSTRUMENTS)
+    if args.symbol:
+        instruments = {s.split("=")[0].upper(): float(s.split("=")[1]) for s in args.symbol}
+    paths: Dict[str, PricePath] = {}
+    for symbol, price in instruments.items():
+        if args.volatility > 0:
+            paths[symbol] = PricePath.random_walk(price, args.volatility, seed=args.seed)
+    for spec in args.path_csv:
+        symbol, path = spec.split("=", 1)
+        paths[symbol.upper()] = PricePath.from_csv(path)
+
+    server = SimServer(MatchingEngine(instruments), args.host, args.port, paths, args.tick)
+    credentials = [tuple(a.split(":", 1)) for a in args.account] or [generate_credentials() for _ in range(args.accounts)]
+    for i, (key, secret) in enumerate(credentials, 1):
+        server.add_account(key, secret, args.collateral)
+        logger.info(f"account {i}: KEY{i}={key} KEY{i}SEC={secret}")
+    logger.info(f"serving {', '.join(instruments)} on {server.url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
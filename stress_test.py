@@ -1,22 +1,25 @@
 import time
-import json
 import base64
 import requests
 import logging
 from datetime import datetime, timezone, timedelta
+from instruments import InstrumentRegistry, index_by_symbol
 
 # Configure Logger for Stress Test
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("StressTest")
 
+HTTP_TIMEOUT = 10  # seconds, for plain HTTP calls outside the API client
+
 def slow_print(msg):
     """Custom print with 0.1s delay for Railway logging limitations."""
     print(msg)
     time.sleep(0.1)
 
 class StressTester:
-    def __init__(self, api_interface, symbol_map, leverage, repo_owner, repo_name, pat):
+    def __init__(self, api_interface, symbol_map, leverage, repo_owner, repo_name, pat, order_books=None):
         self.kf = api_interface
+        self.order_books = order_books or {}
         self.symbol_map = symbol_map
         self.leverage = leverage
         self.repo_owner = repo_owner
@@ -24,7 +27,9 @@ class StressTester:
         self.pat = pat
         self.logs = []
         self.equity = 0.0
-        self.instrument_specs = {}
+        self.instruments = InstrumentRegistry(api_interface)
+        self._tickers_source = None
+        self._tickers_index = {}
 
     def log(self, message):
         """Log to local stdout and append to internal log for upload."""
@@ -37,22 +42,23 @@ class StressTester:
         """Fetches lot size and tick size to ensure valid orders."""
         self.log("Fetching Instrument Specifications...")
         try:
-            url = "https://futures.kraken.com/derivatives/api/v3/instruments"
-            resp = requests.get(url, timeout=10).json()
-            if "instruments" in resp:
-                for inst in resp["instruments"]:
-                    sym = inst["symbol"].lower()
-                    self.instrument_specs[sym] = {
-                        "lotSize": float(inst.get("lotSize", 1.0)),
-                        "tickSize": float(inst.get("tickSize", 0.1)),
-                        "contractSize": float(inst.get("contractSize", 1.0))
-                    }
-                self.log(f"Success: Loaded specs for {len(self.instrument_specs)} instruments.")
+            self.instruments.refresh()
+            if len(self.instruments):
+                self.log(f"Success: Loaded specs for {len(self.instruments)} instruments.")
             else:
                 self.log("Warning: Failed to parse instruments (no 'instruments' key).")
         except Exception as e:
             self.log(f"Error fetching specs: {e}")
 
+    def _mark_price(self, symbol):
+        """Mark price from tickers, indexed once per distinct tickers response."""
+        tickers = self.kf.get_tickers()
+        if tickers is not self._tickers_source:
+            self._tickers_index = index_by_symbol(tickers.get("tickers", []))
+            self._tickers_source = tickers
+        ticker = self._tickers_index.get(symbol.upper())
+        return float(ticker["markPrice"]) if ticker and "markPrice" in ticker else 0.0
+
     def run(self):
         self.log("--- STARTING STRESS TEST (Blind Execution Mode) ---")
         
@@ -103,13 +109,13 @@ class StressTester:
         self.log(f"--- Testing {symbol} ---")
         
         try:
-            # A. Get Mark Price
-            tickers = self.kf.get_tickers()
+            # A. Get Mark Price (live in-memory book mid when available)
             mark_price = 0.0
-            for t in tickers.get("tickers", []):
-                if t["symbol"].lower() == symbol.lower():
-                    mark_price = float(t["markPrice"])
-                    break
+            book = self.order_books.get(symbol.upper())
+            if book is not None and book.synced:
+                mark_price = book.mid() or 0.0
+            if mark_price == 0:
+                mark_price = self._mark_price(symbol)
             
             if mark_price == 0:
                 self.log(f"SKIPPING: Could not get mark price for {symbol}")
@@ -117,18 +123,10 @@ class StressTester:
 
             # B. Calculate Size
             raw_size = usd_size / mark_price
-            specs = self.instrument_specs.get(symbol.lower())
+            spec = self.instruments.get(symbol)
             
-            if specs:
-                lot_size = specs['lotSize']
-                size = round(raw_size / lot_size) * lot_size
-                if lot_size.is_integer():
-                    size = int(size)
-                else:
-                    decimals = 0
-                    if "." in str(lot_size):
-                         decimals = len(str(lot_size).split(".")[1])
-                    size = round(size, decimals)
+            if spec:
+                size = spec.round_lots(raw_size)
             else:
                 size = round(raw_size, 3)
 
@@ -252,7 +250,7 @@ class StressTester:
         }
 
         try:
-            get_resp = requests.get(url, headers=headers)
+            get_resp = requests.get(url, headers=headers, timeout=HTTP_TIMEOUT)
             if get_resp.status_code == 200:
                 data["sha"] = get_resp.json()["sha"]
                 self.log("Existing file found. Updating...")
@@ -262,7 +260,7 @@ class StressTester:
             pass
 
         try:
-            put_resp = requests.put(url, headers=headers, json=data)
+            put_resp = requests.put(url, headers=headers, json=data, timeout=HTTP_TIMEOUT)
             if put_resp.status_code in [200, 201]:
                 self.log("SUCCESS: Results uploaded to GitHub.")
             else:
@@ -270,6 +268,6 @@ class StressTester:
         except Exception as e:
             self.log(f"FAILURE: Upload exception {e}")
 
-def run_stress_test(kf_api, symbol_map, leverage, owner, repo, pat):
-    tester = StressTester(kf_api, symbol_map, leverage, owner, repo, pat)
+def run_stress_test(kf_api, symbol_map, leverage, owner, repo, pat, order_books=None):
+    tester = StressTester(kf_api, symbol_map, leverage, owner, repo, pat, order_books)
     tester.run()
\ No newline at end of file
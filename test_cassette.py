@@ -0,0 +1,42 @@
+import base64
+import json
+
+from cassette import RecordedResponse, RecordingTransport, ReplayTransport
+from kraken_futures import KrakenFuturesApi
+
+SECRET = base64.b64encode(b"s" * 64).decode()
+SIDES = {"LONG-KEY": "buy", "SHORT-KEY": "sell"}
+
+
+def fake_exchange(method, url, headers=None, data=None, timeout=None):
+    """Answers openorders with the side that belongs to the calling key."""
+    body = {"result": "success", "openOrders": [{"side": SIDES[headers["APIKey"]]}]}
+    return RecordedResponse(200, {"Content-Type": "application/json"}, json.dumps(body).encode())
+
+
+def open_sides(client):
+    return [o["side"] for o in client.get_open_orders()["openOrders"]]
+
+
+def test_replay_matches_each_account_regardless_of_call_order(tmp_path):
+    path = str(tmp_path / "two_accounts.jsonl.gz")
+
+    recorder = RecordingTransport(path, fake_exchange)
+    for key in ("LONG-KEY", "SHORT-KEY"):
+        assert open_sides(KrakenFuturesApi(key, SECRET, transport=recorder)) == [SIDES[key]]
+    recorder.close()
+
+    replay = ReplayTransport(path)
+    for key in ("SHORT-KEY", "LONG-KEY"):
+        assert open_sides(KrakenFuturesApi(key, SECRET, transport=replay)) == [SIDES[key]]
+    assert replay.remaining() == 0
+
+
+def test_cassette_holds_no_key_material(tmp_path):
+    path = str(tmp_path / "keys.jsonl.gz")
+    recorder = RecordingTransport(path, fake_exchange)
+    KrakenFuturesApi("LONG-KEY", SECRET, transport=recorder).get_open_orders()
+    recorder.close()
+
+    (entry,) = ReplayTransport(path).entries
+    assert entry["account"] and "LONG-KEY" not in json.dumps(entry)
@@ -0,0 +1,159 @@
+import importlib
+import os
+import types
+import time
+
+import pytest
+
+from sim_server import MatchingEngine, SimServer, generate_credentials
+
+SYMBOL = "FF_XBTUSD_260227"
+ORDER_ENDPOINTS = ("batchorder", "sendorder", "editorder", "cancelorder")
+
+
+@pytest.fixture(scope="module")
+def octopus(tmp_path_factory):
+    # the bot logs to a file in the working directory at import
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("octopus"))
+    try:
+        module = importlib.import_module("octopus")
+    finally:
+        os.chdir(cwd)
+    return module
+
+
+@pytest.fixture
+def sim():
+    server = SimServer(MatchingEngine({SYMBOL: 65000.0}), port=0, paths={}).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def bot(octopus, sim, monkeypatch):
+    for name in octopus.KEYS:
+        key, secret = generate_credentials()
+        sim.add_account(key, secret)
+        monkeypatch.setitem(octopus.KEYS[name], "key", key)
+        monkeypatch.setitem(octopus.KEYS[name], "secret", secret)
+    monkeypatch.setattr(octopus, "BASE_URL", sim.url)
+    monkeypatch.setattr(octopus, "METRICS_PORT", 0)
+    # startup flush pauses between its cancel passes; nothing to wait for here
+    monkeypatch.setattr(octopus, "time", types.SimpleNamespace(sleep=lambda s: None, perf_counter=time.perf_counter))
+    instance = octopus.EqualOpportunityBot()
+    yield instance
+    instance.instruments.stop()
+    instance.pool.close()
+
+
+def order_calls(octopus):
+    snapshot = octopus._INSTRUMENTATION.snapshot()
+    return sum(stats["requests"] for endpoint, stats in snapshot.items() if endpoint.rsplit("/", 1)[-1] in ORDER_ENDPOINTS)
+
+
+def reconcile(octopus, bot, name="LONG", resize=False):
+    """Run one reconcile of name; return the order-endpoint calls it made."""
+    client = bot.clients[name]
+    equity = min(bot.get_equity(c) for c in bot.clients.values())
+    before = order_calls(octopus)
+    bot.reconcile_grid(
+        name, client, octopus.KEYS[name], equity, client.get_open_orders(), bot.get_position(client), resize=resize
+    )
+    return order_calls(octopus) - before
+
+
+def live(bot, name="LONG"):
+    return [o for o in bot.clients[name].get_open_orders()["openOrders"] if o["symbol"].upper() == SYMBOL]
+
+
+def limits(bot, name="LONG"):
+    return {o["limitPrice"]: o for o in live(bot, name) if o["orderType"] == "lmt"}
+
+
+def stops(bot, name="LONG"):
+    return [o for o in live(bot, name) if o["orderType"] == "stop"]
+
+
+def test_steady_state_makes_no_order_calls(octopus, bot):
+    assert reconcile(octopus, bot) == 1  # the whole grid in one batch
+    assert len(limits(bot)) == 5 and len(stops(bot)) == 1
+    assert reconcile(octopus, bot) == 0
+
+
+def test_drifted_level_is_edited_in_place(octopus, bot):
+    reconcile(octopus, bot)
+    level = limits(bot)[62000.0]
+    edited = bot.clients["LONG"].edit_order({"orderId": level["order_id"], "size": round(level["unfilledSize"] / 2, 4)})
+    assert edited["editStatus"]["status"] == "edited"
+
+    assert reconcile(octopus, bot) == 1
+    after = limits(bot)[62000.0]
+    assert after["order_id"] == level["order_id"]
+    assert after["unfilledSize"] == level["unfilledSize"]
+
+
+def test_stray_order_is_cancelled(octopus, bot):
+    reconcile(octopus, bot)
+    grid = {o["order_id"] for o in live(bot)}
+    bot.clients["LONG"].send_order(
+        {"orderType": "lmt", "symbol": SYMBOL, "side": "buy", "size": 0.001, "limitPrice": 50000}
+    )
+
+    assert reconcile(octopus, bot) == 1
+    assert {o["order_id"] for o in live(bot)} == grid
+
+
+def test_missing_stop_is_sent(octopus, bot):
+    reconcile(octopus, bot)
+    (stop,) = stops(bot)
+    bot.clients["LONG"].cancel_order({"order_id": stop["order_id"]})
+
+    assert reconcile(octopus, bot) == 1
+    (replacement,) = stops(bot)
+    assert replacement["unfilledSize"] == stop["unfilledSize"]
+    assert replacement["stopPrice"] == stop["stopPrice"]
+
+
+def test_fill_makes_no_order_calls(octopus, bot, sim):
+    reconcile(octopus, bot)
+    (stop,) = stops(bot)
+    sim.engine.set_mark(SYMBOL, 63900.0)  # fills the 64000 level
+    assert bot.get_position(bot.clients["LONG"]) > 0
+
+    assert reconcile(octopus, bot) == 0
+    assert 64000.0 not in limits(bot)
+    assert stops(bot)[0]["unfilledSize"] == stop["unfilledSize"]
+
+
+def test_position_change_resizes_stop_with_one_edit(octopus, bot, sim):
+    reconcile(octopus, bot)
+    sim.engine.set_mark(SYMBOL, 63900.0)
+    client = bot.clients["LONG"]
+    client.send_order({"orderType": "mkt", "symbol": SYMBOL, "side": "sell", "size": 0.05, "reduceOnly": True})
+    (stop,) = stops(bot)
+
+    assert reconcile(octopus, bot) == 1
+    (after,) = stops(bot)
+    assert after["order_id"] == stop["order_id"]
+    assert after["unfilledSize"] == pytest.approx(stop["unfilledSize"] - 0.05)
+
+
+def test_rejected_stop_edit_places_replacement_before_cancelling(octopus, bot, sim, monkeypatch):
+    reconcile(octopus, bot)
+    sim.engine.set_mark(SYMBOL, 63900.0)
+    client = bot.clients["LONG"]
+    client.send_order({"orderType": "mkt", "symbol": SYMBOL, "side": "sell", "size": 0.05, "reduceOnly": True})
+    (stop,) = stops(bot)
+
+    calls = []
+    monkeypatch.setattr(client, "edit_order", lambda params: {"editStatus": {"status": "orderForEditNotFound"}})
+    for method in ("send_order", "cancel_order"):
+        original = getattr(client, method)
+        monkeypatch.setattr(client, method, lambda params, m=method, f=original: calls.append(m) or f(params))
+
+    reconcile(octopus, bot)
+    assert calls == ["send_order", "cancel_order"]
+    (after,) = stops(bot)
+    assert after["order_id"] != stop["order_id"]
+    assert after["unfilledSize"] == pytest.approx(stop["unfilledSize"] - 0.05)
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from kraken_futures import DeadlineExceeded, SingleFlight, deadline
+from kraken_futures_async import AsyncSingleFlight
+
+
+def test_waiter_retries_after_leader_deadline():
+    flight = SingleFlight()
+    calls = []
+    leader_started = threading.Event()
+
+    def fetch():
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            leader_started.set()
+            time.sleep(0.2)
+            raise DeadlineExceeded("leader's own budget ran out")
+        return {"ok": True}
+
+    def leader():
+        with pytest.raises(DeadlineExceeded):
+            with deadline(5):
+                flight.do("k", fetch)
+
+    thread = threading.Thread(target=leader, name="leader")
+    thread.start()
+    leader_started.wait(1)
+    assert flight.do("k", fetch) == {"ok": True}  # no deadline of its own
+    thread.join()
+    assert calls == ["leader", "MainThread"]
+
+
+def test_waiter_shares_leader_error():
+    flight = SingleFlight()
+    leader_started = threading.Event()
+
+    def fetch():
+        leader_started.set()
+        time.sleep(0.1)
+        raise RuntimeError("exchange said no")
+
+    thread = threading.Thread(target=lambda: pytest.raises(RuntimeError, flight.do, "k", fetch))
+    thread.start()
+    leader_started.wait(1)
+    with pytest.raises(RuntimeError):
+        flight.do("k", lambda: pytest.fail("waiter should not call again"))
+    thread.join()
+    assert flight.stats() == {"calls": 2, "coalesced": 1}
+
+
+def test_async_waiter_survives_leader_cancellation():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.1)
+            return {"n": calls}
+
+        leader = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await waiter == {"n": 2}
+        assert not waiter.cancelled()
+        assert leader.cancelled()
+
+    asyncio.run(main())
+
+
+def test_async_waiter_cancellation_leaves_leader_running():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+
+        assert await leader == "done"
+        assert waiter.cancelled()
+
+    asyncio.run(main())